@@ -0,0 +1,79 @@
+from django.db import transaction
+from rest_framework import exceptions, serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+BULK_LIMIT = 500
+NOT_FOUND = 'Объект не найден.'
+NOT_AN_ID = 'Ожидается id объекта.'
+REPEATED = 'Объект уже указан в запросе.'
+FORBIDDEN = 'Недостаточно прав для удаления.'
+
+
+class BulkMixin:
+    """POST и DELETE <список>/bulk/ с массивом объектов или их id.
+
+    Все элементы проверяются разом; если хоть один не прошёл проверку,
+    ничего не меняется, а в ответе 400 — список ошибок по позициям
+    (пустой словарь у корректных элементов). Создание — один
+    bulk_create в транзакции perform_create, см. list_serializer_class
+    сериализатора; удаление — один DELETE по выборке
+    get_bulk_delete_queryset (сигналы удаления при этом срабатывают).
+    """
+
+    def check_bulk_data(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                {'non_field_errors': ['Ожидается список объектов.']})
+        if len(data) > BULK_LIMIT:
+            raise serializers.ValidationError({'non_field_errors': [
+                f'Не больше {BULK_LIMIT} объектов за запрос.']})
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        self.check_bulk_data(request.data)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def get_bulk_delete_queryset(self):
+        return self.get_queryset()
+
+    def has_bulk_delete_permission(self, obj):
+        try:
+            self.check_object_permissions(self.request, obj)
+        except exceptions.PermissionDenied:
+            return False
+        return True
+
+    @bulk.mapping.delete
+    def bulk_delete(self, request, *args, **kwargs):
+        self.check_bulk_data(request.data)
+        ids = [item for item in request.data if type(item) is int]
+        # Права проверяются по связанным объектам (автору) — их берём
+        # тем же запросом.
+        objects = self.get_bulk_delete_queryset().select_related(
+            *getattr(self, 'related_fields', ())).in_bulk(ids)
+        seen, errors = set(), []
+        for item in request.data:
+            error = {}
+            if type(item) is not int:
+                error = {'id': [NOT_AN_ID]}
+            elif item in seen:
+                error = {'id': [REPEATED]}
+            elif item not in objects:
+                error = {'id': [NOT_FOUND]}
+            elif not self.has_bulk_delete_permission(objects[item]):
+                error = {'non_field_errors': [FORBIDDEN]}
+            if type(item) is int:
+                seen.add(item)
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        self.perform_bulk_destroy(list(objects))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @transaction.atomic
+    def perform_bulk_destroy(self, pks):
+        self.get_bulk_delete_queryset().filter(pk__in=pks).delete()
@@ -0,0 +1,47 @@
+"""Условные GET-запросы (ETag / Last-Modified) для вьюсетов API.
+
+Версия ресурса — поколение из posts.cache, которое сигналы сдвигают
+при каждом изменении. Если клиент прислал актуальный If-None-Match,
+ответ 304 отдаётся без запроса к базе и без сериализации.
+If-Modified-Since не учитывается: у Last-Modified точность в секунду,
+и изменение в ту же секунду осталось бы незамеченным.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from posts import cache
+
+
+class ConditionalGetMixin:
+    """Вьюсет возвращает области версий из get_version_scopes();
+    пустой результат отключает условные ответы."""
+
+    def get_version_scopes(self):
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        scopes = self.get_version_scopes()
+        if not scopes:
+            return handler(request, *args, **kwargs)
+        # Версии читаются до данных: изменение, случившееся во время
+        # ответа, сдвинет версию, и следующий опрос получит 200.
+        versions = cache.generations(*scopes)
+        raw = ':'.join([request.get_full_path(), *map(str, versions)])
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        last_modified = max(versions) // 10 ** 9
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,73 @@
+"""Выборочные поля ответа: ``?fields=id,text``.
+
+Сериализатор отдаёт только перечисленные поля, а вьюсет выбирает из
+базы только нужные для них столбцы. Параметр действует на GET-запросы.
+"""
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """Множество запрошенных полей или None, если ограничений нет."""
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsSerializerMixin:
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is None:
+            return
+        unknown = fields - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                FIELDS_PARAM: 'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            })
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """Ограничивает столбцы запроса полями из ?fields.
+
+    Вьюсет перечисляет связи, которые подтягивает select_related,
+    в атрибуте ``related_fields``. Работает в filter_queryset, чтобы
+    не мешать вьюсетам со своим get_queryset.
+    """
+    related_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.related_fields:
+            queryset = queryset.select_related(*self.related_fields)
+        fields = requested_fields(self.request)
+        if fields is None:
+            return queryset
+        serializer = self.get_serializer()
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        columns.update(getattr(self, 'cursor_ordering', ()))
+        related = set()
+        for name in fields & set(serializer.fields):
+            field = serializer.fields[name]
+            if field.source == '*' or isinstance(
+                    field, serializers.SerializerMethodField):
+                # Неизвестно, какие столбцы нужны методу — не ограничиваем.
+                return queryset
+            source = field.source.replace('.', '__')
+            if isinstance(field, serializers.SlugRelatedField):
+                related.add(source)
+                columns.add(f'{source}__{field.slug_field}')
+            else:
+                columns.add(source)
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from posts.paginator import CursorPaginator, InvalidCursor
+
+DEFAULT_PAGE_SIZE = 10
+
+
+class CursorPagination(BasePagination):
+    """Постраничный вывод API по курсору без COUNT и OFFSET.
+
+    Порядок задаётся атрибутом ``cursor_ordering`` вьюсета (по убыванию,
+    последнее поле уникально), по умолчанию — по id.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return min(max(requested, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = CursorPaginator(
+            queryset,
+            self.get_page_size(request),
+            getattr(view, 'cursor_ordering', ('id',)),
+        )
+        try:
+            self.page = paginator.page(
+                request.query_params.get(self.cursor_query_param))
+        except InvalidCursor as error:
+            raise NotFound(str(error))
+        return list(self.page)
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.cursor_query_param,
+                                   self.page.next_cursor)
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.cursor_query_param,
+                                   self.page.previous_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(),
+                                  self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class SearchPagination(PageNumberPagination):
+    """Постраничный вывод результатов поиска.
+
+    Выдача упорядочена по релевантности, а не по полю модели, поэтому
+    курсор по ключу здесь не подходит — страницы нумеруются.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        return (super().get_page_size(request) or
+                api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE)
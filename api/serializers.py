@@ -1,22 +1,91 @@
+from django.db import connections, router, transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from posts import signals, variants
 from posts.models import Comment, Follow, Group, Post, User
+from posts.uploads import BoundedImageField
+from .fieldsets import SparseFieldsSerializerMixin
 
+FOLLOW_EXISTS = 'Такая подписка уже существует!'
+SELF_FOLLOW = 'Нельзя подписаться на самого себя'
+NOT_A_USERNAME = 'Ожидается имя пользователя.'
 
-class PostSerializer(serializers.ModelSerializer):
+
+class ImageVariantsField(serializers.Field):
+    """Готовые варианты картинки: ширина, высота и ссылки на WebP и
+    JPEG; пустой список, пока они строятся."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        result = variants.urls(value)
+        if request is not None:
+            for variant in result:
+                for fmt in variants.FORMATS:
+                    variant[fmt] = request.build_absolute_uri(variant[fmt])
+        return result
+
+
+class PostSerializer(SparseFieldsSerializerMixin,
+                     serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
     )
+    image = serializers.ImageField(
+        _DjangoImageField=BoundedImageField,
+        required=False,
+        allow_null=True,
+    )
+    image_variants = ImageVariantsField()
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'text', 'pub_date', 'author', 'group', 'image',
+                  'image_variants', 'likes_count', 'comments_count')
         model = Post
         read_only_fields = ['author']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentListSerializer(serializers.ListSerializer):
+
+    def create(self, validated_data):
+        if not validated_data:
+            return []
+        post = validated_data[0]['post']
+        db = router.db_for_write(Comment)
+        returns_pks = connections[db].features.can_return_ids_from_bulk_insert
+        with transaction.atomic(using=db, savepoint=False):
+            last_pk = None if returns_pks else self.last_pk(db)
+            comments = Comment.objects.using(db).bulk_create(
+                Comment(**item) for item in validated_data)
+            if not returns_pks:
+                self.set_pks(comments, db, last_pk)
+        signals.comments_bulk_created(post.pk, comments)
+        return comments
+
+    @staticmethod
+    def last_pk(db):
+        return Comment.objects.using(db).order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+
+    @staticmethod
+    def set_pks(comments, db, last_pk):
+        """Проставляет id, если СУБД (SQLite) не вернула их из
+        bulk_create. Транзакции SQLite сериализуемы: строки с id больше
+        last_pk, прочитанного в той же транзакции до вставки, — ровно
+        вставленные ею, по возрастанию id в порядке вставки."""
+        pks = Comment.objects.using(db).filter(pk__gt=last_pk).order_by(
+            'pk').values_list('pk', flat=True)
+        for comment, pk in zip(comments, pks):
+            comment.pk = pk
+
+
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -26,9 +95,65 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'author', 'post', 'text', 'created')
         model = Comment
         read_only_fields = ['author', 'post']
+        list_serializer_class = CommentListSerializer
+
+
+class FollowListSerializer(serializers.ListSerializer):
+    """Массовая подписка текущего пользователя.
+
+    Проверки FollowSerializer выполняются для всей пачки двумя
+    запросами: авторы по username и уже существующие подписки.
+    """
 
+    @staticmethod
+    def author_of(item):
+        return item.get('author') if isinstance(item, dict) else None
 
-class FollowSerializer(serializers.ModelSerializer):
+    def to_internal_value(self, data):
+        user = self.context['request'].user
+        usernames = {username for username in map(self.author_of, data)
+                     if isinstance(username, str)}
+        authors = User.objects.in_bulk(list(usernames),
+                                       field_name='username')
+        following = set(Follow.objects.filter(
+            user=user, author__username__in=usernames,
+        ).values_list('author__username', flat=True))
+        result, errors = [], []
+        for item in data:
+            username = self.author_of(item)
+            error = {}
+            if username is not None and not isinstance(username, str):
+                error = {'author': [NOT_A_USERNAME]}
+            elif not username:
+                error = {'author': ['Обязательное поле.']}
+            elif username not in authors:
+                error = {'author': [f'Пользователь {username} не найден.']}
+            elif authors[username] == user:
+                error = {'non_field_errors': [SELF_FOLLOW]}
+            elif username in following:
+                error = {'non_field_errors': [FOLLOW_EXISTS]}
+            else:
+                following.add(username)
+                result.append({'user': user, 'author': authors[username]})
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return result
+
+    def create(self, validated_data):
+        if not validated_data:
+            return []
+        user = validated_data[0]['user']
+        authors = [item['author'] for item in validated_data]
+        Follow.objects.bulk_create(Follow(**item) for item in validated_data)
+        signals.follows_bulk_created(
+            user.pk, [author.pk for author in authors])
+        return list(Follow.objects.filter(
+            user=user, author__in=authors).select_related('user', 'author'))
+
+
+class FollowSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     user = serializers.SlugRelatedField(
         slug_field='username',
         queryset=User.objects.all(),
@@ -47,20 +172,20 @@ class FollowSerializer(serializers.ModelSerializer):
             UniqueTogetherValidator(
                 queryset=Follow.objects.all(),
                 fields=['user', 'author'],
-                message='Такая подписка уже существует!'
+                message=FOLLOW_EXISTS
             )
         ]
+        list_serializer_class = FollowListSerializer
 
     def validate(self, data):
         """ Проверка на выполнение условия """
         if data['user'] == data['author']:
-            raise serializers.ValidationError(
-                "Нельзя подписаться на самого себя"
-            )
+            raise serializers.ValidationError(SELF_FOLLOW)
         return data
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
 
     class Meta:
         fields = ['title']
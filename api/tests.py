@@ -1,3 +1,389 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.bulk import BULK_LIMIT, NOT_FOUND
+from api.serializers import (
+    FOLLOW_EXISTS,
+    NOT_A_USERNAME,
+    SELF_FOLLOW,
+    CommentSerializer,
+    PostSerializer,
+)
+from posts.models import (
+    Comment,
+    Follow,
+    Like,
+    Post,
+    TimelineEntry,
+    User,
+    UserStats,
+)
+
+POSTS_URL = reverse('post-list')
+
+
+class PostListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(3)]
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}',
+                 author=cls.authors[number % len(cls.authors)])
+            for number in range(15)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_pages_follow_cursor(self):
+        """Страницы по курсору не пересекаются и покрывают все посты."""
+        first = self.client.get(POSTS_URL).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('-pub_date', '-id')
+                      .values_list('id', flat=True)))
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_page_size_param(self):
+        response = self.client.get(POSTS_URL, {'page_size': 4})
+        self.assertEqual(len(response.json()['results']), 4)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(POSTS_URL, {'cursor': 'мусор'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_authors_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(POSTS_URL)
+        self.assertEqual(response.json()['results'][0]['author'],
+                         Post.objects.latest('pub_date', 'id').author.username)
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        Comment.objects.create(text='Комментарий', post=cls.post,
+                               author=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get(self, url, fields):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': fields})
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_fields_restrict_output_and_columns(self):
+        response, sql = self.get(POSTS_URL, 'id,text')
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'text'})
+        self.assertNotIn('"image"', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_related_field_joined_only_when_requested(self):
+        response, sql = self.get(POSTS_URL, 'text,author')
+        self.assertEqual(response.json()['results'][0],
+                         {'text': 'Пост', 'author': 'author'})
+        self.assertIn('auth_user', sql)
+        self.assertNotIn('"email"', sql)
+
+    def test_detail_and_comments(self):
+        detail = reverse('post-detail', kwargs={'pk': self.post.id})
+        self.assertEqual(self.get(detail, 'id')[0].json(),
+                         {'id': self.post.id})
+        self.client.force_authenticate(self.user)
+        comments = reverse('Comment-list', kwargs={'post_id': self.post.id})
+        self.assertEqual(self.get(comments, 'text')[0].json()['results'],
+                         [{'text': 'Комментарий'}])
+
+    def test_unknown_field(self):
+        response, _ = self.get(POSTS_URL, 'id,password')
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.detail_url = reverse('post-detail', kwargs={'pk': self.post.id})
+        self.comments_url = reverse('Comment-list',
+                                    kwargs={'post_id': self.post.id})
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_resources_skip_serializer(self):
+        """304 отдаётся без запросов к базе и без сериализации."""
+        cases = (
+            (POSTS_URL, PostSerializer),
+            (self.detail_url, PostSerializer),
+            (self.comments_url, CommentSerializer),
+        )
+        for url, serializer in cases:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with mock.patch.object(serializer, 'to_representation') as \
+                        to_representation, self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                to_representation.assert_not_called()
+
+    def test_if_modified_since_is_ignored(self):
+        """Изменение в ту же секунду не даёт устаревшего 304."""
+        last_modified = self.client.get(POSTS_URL)['Last-Modified']
+        Post.objects.create(text='Новый', author=self.user)
+        response = self.client.get(POSTS_URL,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_changes_produce_new_version(self):
+        changes = (
+            (POSTS_URL, lambda: Post.objects.create(text='Новый',
+                                                    author=self.user)),
+            (self.detail_url, lambda: Like.objects.create(
+                post=self.post, author=self.reader)),
+            (self.comments_url, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий')),
+            (POSTS_URL, lambda: Comment.objects.filter(
+                post=self.post).delete()),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_query_string_is_part_of_version(self):
+        etag = self.client.get(POSTS_URL)['ETag']
+        response = self.client.get(POSTS_URL, {'fields': 'id'},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_post_is_not_cached(self):
+        url = reverse('post-detail', kwargs={'pk': self.post.id + 100})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class BulkCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(5)]
+        cls.post = Post.objects.create(text='Пост', author=cls.authors[0])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.comments_url = reverse('Comment-bulk',
+                                    kwargs={'post_id': self.post.id})
+        self.follow_url = reverse('follow-bulk')
+
+    def test_bulk_comments(self):
+        data = [{'text': f'Комментарий {number}'} for number in range(20)]
+        # Последний id до вставки, вставка, выборка созданных, счётчик
+        # и поисковый индекс — по одному запросу на всю пачку.
+        with self.assertNumQueries(8):
+            response = self.client.post(self.comments_url, data,
+                                        format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['text'] for item in response.json()],
+                         [item['text'] for item in data])
+        self.assertTrue(all(item['id'] for item in response.json()))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 20)
+
+    def test_bulk_comments_all_or_nothing(self):
+        data = [{'text': 'Хороший'}, {'text': ''}]
+        response = self.client.post(self.comments_url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('text', response.json()[1])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_bulk_comments_missing_post(self):
+        url = reverse('Comment-bulk', kwargs={'post_id': self.post.id + 1})
+        response = self.client.post(url, [{'text': 'Текст'}], format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_follow(self):
+        data = [{'author': author.username} for author in self.authors]
+        response = self.client.post(self.follow_url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(UserStats.objects.get(user=self.user)
+                         .following_count, 5)
+        self.assertEqual(UserStats.objects.get(user=self.authors[0])
+                         .followers_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=self.post).exists())
+
+    def test_bulk_follow_validation_queries_do_not_grow(self):
+        """Проверка пачки не делает запрос на каждый объект."""
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        data = [
+            {'author': self.authors[0].username},
+            {'author': self.authors[1].username},
+            {'author': self.user.username},
+            {'author': 'nobody'},
+            {'author': self.authors[0].username},
+            {},
+        ]
+        with self.assertNumQueries(2):
+            response = self.client.post(self.follow_url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {'non_field_errors': [FOLLOW_EXISTS]})
+        self.assertEqual(errors[2], {'non_field_errors': [SELF_FOLLOW]})
+        self.assertIn('author', errors[3])
+        self.assertEqual(errors[4], {'non_field_errors': [FOLLOW_EXISTS]})
+        self.assertIn('author', errors[5])
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_limit(self):
+        data = [{'text': 'Текст'}] * (BULK_LIMIT + 1)
+        response = self.client.post(self.comments_url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_create_fetches_post_once(self):
+        url = reverse('Comment-list', kwargs={'post_id': self.post.id})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, {'text': 'Текст'}, format='json')
+        post_lookups = [query for query in queries
+                        if query['sql'].startswith('SELECT') and
+                        'FROM "posts_post"' in query['sql']]
+        self.assertEqual(len(post_lookups), 1)
+
+    def test_bulk_comments_match_ids_of_their_batch(self):
+        other = APIClient()
+        other.force_authenticate(self.authors[1])
+        other.post(self.comments_url, [{'text': 'Чужой'}], format='json')
+        data = [{'text': 'Одинаковый'}, {'text': 'Другой'},
+                {'text': 'Одинаковый'}]
+        response = self.client.post(self.comments_url, data, format='json')
+        self.client.post(self.comments_url, [{'text': 'Поздний'}],
+                         format='json')
+        for item in response.json():
+            self.assertEqual(Comment.objects.get(pk=item['id']).text,
+                             item['text'])
+        self.assertEqual(len({item['id'] for item in response.json()}), 3)
+
+    def test_bulk_comments_with_equal_text_and_time(self):
+        """Совпадение текста и времени с чужой пачкой не путает id."""
+        moment = timezone.now()
+        data = [{'text': 'Одинаковый'}, {'text': 'Одинаковый'}]
+        with mock.patch('django.utils.timezone.now', return_value=moment):
+            first = self.client.post(self.comments_url, data, format='json')
+            second = self.client.post(self.comments_url, data + data,
+                                      format='json')
+        ids = [item['id'] for item in first.json() + second.json()]
+        self.assertEqual(ids, list(Comment.objects.order_by(
+            'pk').values_list('pk', flat=True)))
+
+    def test_bulk_follow_rejects_non_string_author(self):
+        data = [{'author': ['bob']}, {'author': {'name': 'bob'}},
+                {'author': self.authors[0].username}]
+        response = self.client.post(self.follow_url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {'author': [NOT_A_USERNAME]})
+        self.assertEqual(errors[1], {'author': [NOT_A_USERNAME]})
+        self.assertEqual(errors[2], {})
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+
+class BulkDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(3)]
+        cls.post = Post.objects.create(text='Пост', author=cls.authors[0])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.comments_url = reverse('Comment-bulk',
+                                    kwargs={'post_id': self.post.id})
+        self.follow_url = reverse('follow-bulk')
+        self.comments = [Comment.objects.create(
+            post=self.post, author=self.user, text=f'Комментарий {number}')
+            for number in range(3)]
+        self.follows = [Follow.objects.create(user=self.user, author=author)
+                        for author in self.authors]
+
+    def test_bulk_delete_comments(self):
+        ids = [comment.pk for comment in self.comments[:2]]
+        response = self.client.delete(self.comments_url, ids, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)),
+                         [self.comments[2].pk])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_bulk_delete_reports_errors_per_item(self):
+        foreign = Comment.objects.create(post=self.post, author=self.other,
+                                         text='Чужой')
+        ids = [self.comments[0].pk, foreign.pk, 100500, 'x',
+               self.comments[0].pk]
+        response = self.client.delete(self.comments_url, ids, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('non_field_errors', errors[1])
+        for position in (2, 3, 4):
+            self.assertIn('id', errors[position])
+        self.assertEqual(Comment.objects.count(), 4)
+
+    def test_bulk_unfollow(self):
+        foreign = Follow.objects.create(user=self.other,
+                                        author=self.authors[0])
+        response = self.client.delete(
+            self.follow_url, [self.follows[0].pk, foreign.pk], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[1], {'id': [NOT_FOUND]})
+        response = self.client.delete(
+            self.follow_url, [follow.pk for follow in self.follows[:2]],
+            format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            list(Follow.objects.filter(user=self.user).values_list(
+                'author', flat=True)), [self.authors[2].pk])
+        self.assertEqual(UserStats.objects.get(user=self.user)
+                         .following_count, 1)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user, post=self.post).exists())
 
-# Create your tests here.
+    def test_bulk_delete_limit(self):
+        response = self.client.delete(
+            self.comments_url, list(range(BULK_LIMIT + 1)), format='json')
+        self.assertEqual(response.status_code, 400)
@@ -5,7 +5,13 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView
 )
 
-from .views import CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet
+from .views import (
+    CommentViewSet,
+    FollowViewSet,
+    GroupViewSet,
+    PostViewSet,
+    TagPostsViewSet,
+)
 
 router_v1 = DefaultRouter()
 
@@ -18,6 +24,8 @@ router_v1.register(
 
 router_v1.register('follow', FollowViewSet, basename='follow')
 router_v1.register('group', GroupViewSet, basename='group')
+router_v1.register(r'tags/(?P<tag>[^/.]+)/posts', TagPostsViewSet,
+                   basename='tag-posts')
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
@@ -1,9 +1,19 @@
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets, mixins
+from rest_framework import filters, status, viewsets, mixins
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from posts.models import Comment, Follow, Group, Post
+from posts import cache, likes, search, tags, trending
+from posts.models import Comment, Follow, Group, Post, Tag
+from posts.paginator import COMMENT_ORDERING
+from .bulk import BulkMixin
+from .conditional import ConditionalGetMixin
+from .fieldsets import SparseFieldsViewMixin
+from .pagination import SearchPagination
 from .permission import IsOwnerOrReadOnly
 from .serializers import (
     CommentSerializer,
@@ -13,35 +23,115 @@ from .serializers import (
 )
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ConditionalGetMixin,
+                  SparseFieldsViewMixin,
+                  viewsets.ModelViewSet):
+    # group отдаётся как id, поэтому join нужен только с автором.
     queryset = Post.objects.all()
+    related_fields = ('author',)
+    cursor_ordering = ('pub_date', 'id')
+    lookup_value_regex = r'\d+'
     serializer_class = PostSerializer
     permission_classes = (IsOwnerOrReadOnly,)
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['group']
 
+    def get_version_scopes(self):
+        if self.action == 'retrieve':
+            return (cache.post_scope(self.kwargs['pk']),)
+        if self.search_query() is not None:
+            return (cache.POSTS, cache.SEARCH)
+        return (cache.POSTS,)
+
+    def get_queryset(self):
+        if self.action == 'popular':
+            return trending.popular(Post.objects.all())
+        return super().get_queryset()
+
+    @action(detail=False)
+    def popular(self, request):
+        # Тот же list с фильтрами и полями, но по рейтингу популярности.
+        self.cursor_ordering = trending.ORDERING
+        return self.list(request)
+
+    @action(detail=True, methods=['post', 'delete'],
+            permission_classes=[IsAuthenticated])
+    def like(self, request, pk):
+        # Повторный запрос ничего не меняет: лайк ставится и снимается
+        # одной командой SQL (posts/likes.py).
+        liked = request.method == 'POST'
+        changed = (likes.like if liked else likes.unlike)(
+            int(pk), request.user.pk)
+        likes_count = Post.objects.filter(pk=pk).values_list(
+            'likes_count', flat=True).first()
+        if likes_count is None:
+            raise Http404
+        if changed is None:
+            code = status.HTTP_202_ACCEPTED
+        elif changed and liked:
+            code = status.HTTP_201_CREATED
+        else:
+            code = status.HTTP_200_OK
+        return Response({'liked': liked, 'likes_count': likes_count},
+                        status=code)
+
+    def search_query(self):
+        if self.action != 'list':
+            return None
+        return self.request.query_params.get('search')
+
+    @property
+    def paginator(self):
+        if self.search_query() is not None and not hasattr(
+                self, '_paginator'):
+            self._paginator = SearchPagination()
+        return super().paginator
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        query = self.search_query()
+        if query is None:
+            return queryset
+        return search.search(query, queryset)
+
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(BulkMixin,
+                     ConditionalGetMixin,
+                     SparseFieldsViewMixin,
+                     viewsets.ModelViewSet):
     queryset = Comment.objects.all()
+    related_fields = ('author',)
+    # Тот же курсор, что у «Показать ещё» на странице поста.
+    cursor_ordering = COMMENT_ORDERING
     serializer_class = CommentSerializer
     permission_classes = (IsOwnerOrReadOnly, IsAuthenticated)
 
+    def get_version_scopes(self):
+        return (cache.comments_scope(self.kwargs['post_id']),)
+
+    def get_post(self):
+        if not hasattr(self, '_post'):
+            self._post = get_object_or_404(Post, id=self.kwargs["post_id"])
+        return self._post
+
     def get_queryset(self, *args, **kwargs):
-        post = get_object_or_404(Post, id=self.kwargs["post_id"])
-        comments = post.comments.all()
+        comments = self.get_post().comments.all()
         return comments
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user,
-            post=get_object_or_404(Post, id=self.kwargs["post_id"])
+            post=self.get_post()
         )
 
 
 class GroupViewSet(
+        SparseFieldsViewMixin,
         mixins.CreateModelMixin,
         mixins.ListModelMixin,
         viewsets.GenericViewSet
@@ -52,10 +142,13 @@ class GroupViewSet(
 
 
 class FollowViewSet(
+        BulkMixin,
+        SparseFieldsViewMixin,
         mixins.CreateModelMixin,
         mixins.ListModelMixin,
         viewsets.GenericViewSet
 ):
+    related_fields = ('user', 'author')
     serializer_class = FollowSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     filter_backends = [filters.SearchFilter]
@@ -63,3 +156,37 @@ class FollowViewSet(
 
     def get_queryset(self):
         return Follow.objects.filter(author=self.request.user)
+
+    def get_bulk_delete_queryset(self):
+        # Удалять можно только свои подписки.
+        return Follow.objects.filter(user=self.request.user)
+
+    def has_bulk_delete_permission(self, obj):
+        return obj.user == self.request.user
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save()
+
+
+class TagPostsViewSet(ConditionalGetMixin,
+                      mixins.ListModelMixin,
+                      viewsets.GenericViewSet):
+    """Посты с тегом: курсор идёт по индексу (tag, pub_date, post)
+    таблицы PostTag, сами посты подгружаются одним запросом."""
+    serializer_class = PostSerializer
+    permission_classes = (IsOwnerOrReadOnly,)
+    cursor_ordering = ('pub_date', 'post_id')
+
+    def get_version_scopes(self):
+        return (cache.POSTS,)
+
+    def get_queryset(self):
+        tag = get_object_or_404(Tag, name=self.kwargs['tag'].lower())
+        return tag.post_tags.all()
+
+    def paginate_queryset(self, queryset):
+        super().paginate_queryset(queryset)
+        page = tags.resolve_posts(self.paginator.page,
+                                  Post.objects.select_related('author'))
+        return list(page)
@@ -0,0 +1,96 @@
+"""Сколько байт картинок скачивает клиент за страницу ленты.
+
+Сравниваются исходные файлы (их отдаёт поле image в API), прежнее
+единственное превью 960x339 в JPEG (sorl-thumbnail) и вариант из
+srcset, который браузер выберет для ширины экрана.
+
+    python -m benchmarks.bench_image_bytes --posts 10
+"""
+import argparse
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from benchmarks.common import setup_django, temporary_database
+
+# (название, ширина окна в CSS-пикселях, плотность пикселей экрана)
+VIEWPORTS = (
+    ('phone', 375, 2),
+    ('tablet', 768, 1),
+    ('desktop', 1280, 1),
+)
+
+
+def card_width(viewport):
+    # Совпадает с атрибутом sizes в templates/post_item.html.
+    if viewport >= 1200:
+        return 825
+    if viewport >= 768:
+        return viewport * 3 // 4
+    return viewport
+
+
+def photo(width, height):
+    """Шумная картинка, сжимающаяся примерно как фотография."""
+    from PIL import Image
+    image = Image.effect_noise((width // 8, height // 8), 64).convert('RGB')
+    image = image.resize((width, height), Image.BICUBIC)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def run(posts, width, height):
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from sorl.thumbnail import get_thumbnail
+
+    from posts import variants
+    from posts.models import Post, User
+
+    author = User.objects.create_user(username='bench')
+    for number in range(posts):
+        Post.objects.create(
+            text=f'Бенчмарк {number}', author=author,
+            image=ContentFile(photo(width, height), f'{number}.jpg'))
+
+    results = {'posts': posts, 'original_size': f'{width}x{height}',
+               'original': 0, 'single_960_jpeg': 0}
+    results.update({name: 0 for name, _, _ in VIEWPORTS})
+    for post in Post.objects.all():
+        results['original'] += post.image.size
+        thumbnail = get_thumbnail(post.image, '960x339', crop='center',
+                                  upscale=True)
+        results['single_960_jpeg'] += default_storage.size(thumbnail.name)
+        found = variants.decode(post.image_variants)
+        for name, viewport, density in VIEWPORTS:
+            needed = card_width(viewport) * density
+            variant = next(
+                (item for item in found if item['width'] >= needed),
+                found[-1])
+            results[name] += default_storage.size(variant['webp'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    args = parser.parse_args()
+    setup_django()
+    from django.test.utils import override_settings
+
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0), \
+                temporary_database():
+            results = run(args.posts, args.width, args.height)
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Анонимные запросы в секунду с кэшем страниц и без него.
+
+Страницы index, group_post, profile и post_view запрашиваются без
+входа на сайт; первый проход — с PAGE_CACHE_TIMEOUT = 0 (каждый
+запрос строит страницу), второй — с кэшем.
+
+    python -m benchmarks.bench_page_cache --posts 20000 --requests 500
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.bench_views import page_endpoints, seed
+from benchmarks.common import percentiles, setup_django, temporary_database
+
+
+def measure(client, url, requests):
+    timings = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - start
+    return dict(percentiles(timings), status=response.status_code,
+                rps=round(requests / elapsed, 1))
+
+
+def run(posts, requests):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    sizes = {'users': max(posts // 20, 10), 'groups': 20, 'posts': posts,
+             'comments': posts * 2, 'likes': posts * 2, 'follows': 0}
+    sample = seed(**sizes, rng=random.Random(0))
+    client = Client()
+    results = {'dataset': sizes, 'requests': requests}
+    for name, url, _ in page_endpoints(sample):
+        if name == 'follow_index':
+            # Только для вошедших.
+            continue
+        results[name] = {}
+        for mode, timeout in (('no_cache', 0), ('page_cache', 30)):
+            cache.clear()
+            with override_settings(PAGE_CACHE_TIMEOUT=timeout):
+                results[name][mode] = measure(client, url, requests)
+        results[name]['speedup'] = round(
+            results[name]['page_cache']['rps'] /
+            results[name]['no_cache']['rps'], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    setup_django()
+    with temporary_database(on_disk=True):
+        results = run(args.posts, args.requests)
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Сравнение Paginator (COUNT + OFFSET) и CursorPaginator на глубоких
+страницах ленты.
+
+    python -m benchmarks.bench_pagination --posts 20000 --page 1000
+"""
+import argparse
+import json
+
+from benchmarks.common import measure, setup_django, temporary_database
+
+PER_PAGE = 10
+
+
+def seed(posts):
+    from posts.models import Post, User
+    author = User.objects.create_user(username='bench')
+    Post.objects.bulk_create(
+        Post(text=f'Бенчмарк {number}', author=author)
+        for number in range(posts)
+    )
+
+
+def run(posts, page_number, repeat):
+    from django.core.paginator import Paginator
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from posts.models import Post
+    from posts.paginator import NEXT, CursorPaginator
+
+    seed(posts)
+
+    def offset_page():
+        paginator = Paginator(Post.objects.all(), PER_PAGE)
+        list(paginator.get_page(page_number))
+
+    # Курсор, который пользователь получил бы, дойдя до нужной страницы.
+    cursor_paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+    last_on_previous = Post.objects.order_by('-pub_date', '-id')[
+        (page_number - 1) * PER_PAGE - 1]
+    cursor = cursor_paginator.encode_cursor(last_on_previous, NEXT)
+
+    def cursor_page():
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        list(paginator.get_page(cursor))
+
+    results = {'posts': posts, 'page': page_number}
+    for name, func in (('paginator', offset_page),
+                       ('cursor', cursor_page)):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        results[name] = dict(measure(func, repeat), queries=len(queries))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--page', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    setup_django()
+    with temporary_database():
+        results = run(args.posts, args.page, args.repeat)
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
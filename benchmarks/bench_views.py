@@ -0,0 +1,291 @@
+"""Страницы сайта и API на большом наборе данных.
+
+Заполняет базу синтетическими пользователями, группами, постами,
+комментариями, лайками и подписками (bulk-вставками, затем теми же
+командами пересчёта, что и на сервере), после чего для каждой
+страницы и каждого GET-эндпоинта ``/api/v1/`` замеряет пропускную
+способность, процентили времени ответа и число запросов к БД — на
+холодном кэше и на прогретом.
+
+    python -m benchmarks.bench_views --output before.json
+    python -m benchmarks.bench_views --output after.json --compare before.json
+
+Эндпоинты API берутся из роутера, так что новый эндпоинт попадает в
+замеры сам. Данные генерируются с фиксированным --seed, поэтому
+результаты разных коммитов сопоставимы.
+"""
+import argparse
+import json
+import logging
+import random
+import subprocess
+import time
+from contextlib import ExitStack
+from io import StringIO
+
+from benchmarks.common import percentiles, setup_django, temporary_database
+
+TAG = 'бенчмарк'
+
+
+def seed(users, groups, posts, comments, likes, follows, rng):
+    """Возвращает образцы объектов для подстановки в адреса.
+
+    Размер пачки bulk_create Django выбирает сам: у SQLite он ограничен
+    числом параметров запроса.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+
+    from posts import search, tags
+    from posts.counters import recount_posts, recount_user_stats
+    from posts.models import Comment, Follow, Group, Like, Post, User
+
+    password = make_password(None)
+    User.objects.bulk_create(
+        (User(username=f'user{number}', password=password)
+         for number in range(users)))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    Group.objects.bulk_create(
+        Group(title=f'Группа {number}', slug=f'group{number}',
+              description='Группа для бенчмарка')
+        for number in range(groups))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    # Каждый десятый пост без группы, каждый двадцатый — с тегом.
+    Post.objects.bulk_create(
+        (Post(text=f'Пост номер {number} #{TAG}' if number % 20 == 0
+              else f'Пост номер {number}',
+              author_id=rng.choice(user_ids),
+              group_id=(rng.choice(group_ids)
+                        if group_ids and number % 10 else None))
+         for number in range(posts)))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (Comment(post_id=rng.choice(post_ids),
+                 author_id=rng.choice(user_ids),
+                 text=f'Комментарий {number}')
+         for number in range(comments)))
+    Like.objects.bulk_create(
+        (Like(post_id=post_id, author_id=author_id)
+         for post_id, author_id in pairs(post_ids, user_ids, likes, rng)),
+        ignore_conflicts=True)
+    Follow.objects.bulk_create(
+        (Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in pairs(user_ids, user_ids, follows, rng)
+         if user_id != author_id),
+        ignore_conflicts=True)
+
+    # bulk_create не посылает сигналов: счётчики, ленты подписок,
+    # поиск и теги достраиваются так же, как после миграции данных.
+    recount_posts()
+    recount_user_stats()
+    call_command('rebuild_timelines', stdout=StringIO())
+    search.rebuild()
+    tags.backfill()
+
+    # Самый активный автор и пост с наибольшим числом комментариев —
+    # худший случай для страниц профиля и поста.
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    reader = (Follow.objects.values_list('user', flat=True)
+              .order_by('user').first())
+    return {
+        'reader': User.objects.get(pk=reader or user_ids[0]),
+        'post': post,
+        'comment': post.comments.first(),
+        'group': Group.objects.first(),
+        'username': post.author.username,
+    }
+
+
+def pairs(left, right, count, rng):
+    """count случайных пар (без гарантии уникальности)."""
+    return ((rng.choice(left), rng.choice(right)) for _ in range(count))
+
+
+def page_endpoints(sample):
+    from django.urls import reverse
+    post = sample['post']
+    return [
+        ('index', reverse('index'), {}),
+        ('group_post', reverse('group_post', args=[sample['group'].slug]),
+         {}),
+        ('profile', reverse('profile', args=[sample['username']]), {}),
+        ('post_view', reverse('post', args=[sample['username'], post.pk]),
+         {}),
+        ('follow_index', reverse('follow_index'), {}),
+    ]
+
+
+def api_endpoints(sample):
+    """GET-эндпоинты роутера /api/v1/ с подставленными параметрами."""
+    from django.urls import reverse
+
+    from api.urls import router_v1
+
+    values = {
+        'post_id': sample['post'].pk,
+        'tag': TAG,
+    }
+    detail = {
+        'post': sample['post'].pk,
+        'Comment': sample['comment'].pk,
+        'group': sample['group'].pk,
+    }
+    endpoints = []
+    for pattern in router_v1.urls:
+        groups = pattern.pattern.regex.groupindex
+        if 'format' in groups:
+            continue
+        kwargs = {name: values.get(name) for name in groups}
+        if 'pk' in groups:
+            kwargs['pk'] = detail.get(pattern.name.rsplit('-', 1)[0])
+        if None in kwargs.values():
+            continue
+        endpoints.append(
+            (f'api:{pattern.name}', reverse(pattern.name, kwargs=kwargs), {}))
+    # Варианты списка постов, которые обслуживаются отдельным кодом.
+    posts_url = reverse('post-list')
+    endpoints += [
+        ('api:post-list?search', posts_url, {'search': 'пост номер'}),
+        ('api:post-list?group', posts_url, {'group': sample['group'].pk}),
+        ('api:post-list?fields', posts_url, {'fields': 'id,text'}),
+    ]
+    return endpoints
+
+
+class QueryCounter:
+    """Считает запросы ко всем базам. CaptureQueriesContext здесь не
+    годится: журнал запросов обнуляется в начале каждого запроса."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        from django.db import connections
+        self.count = 0
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def measure_endpoint(client, url, params, repeat):
+    from django.core.cache import cache
+
+    cache.clear()
+    with QueryCounter() as cold:
+        response = client.get(url, params)
+    if response.status_code == 405:
+        # Эндпоинт только для записи, например .../bulk/.
+        return None
+    with QueryCounter() as warm:
+        client.get(url, params)
+    timings = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        request_start = time.perf_counter()
+        client.get(url, params)
+        timings.append(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - start
+    return dict(
+        percentiles(timings),
+        status=response.status_code,
+        rps=round(repeat / elapsed, 1),
+        queries_cold=cold.count,
+        queries=warm.count,
+    )
+
+
+def run(sizes, repeat, rng):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    # 404 и 405 попадают в отчёт, трейсбеки в консоли не нужны.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    started = time.perf_counter()
+    sample = seed(**sizes, rng=rng)
+    results = {
+        'commit': git_commit(),
+        'engine': connection.vendor,
+        'dataset': sizes,
+        'seed_seconds': round(time.perf_counter() - started, 1),
+        'repeat': repeat,
+        'endpoints': {},
+    }
+    client = APIClient()
+    # Авторизованный читатель: follow_index и /api/v1/follow/ без
+    # входа недоступны, остальные страницы отдаются ему так же.
+    client.force_login(sample['reader'])
+    client.force_authenticate(sample['reader'])
+    for name, url, params in (page_endpoints(sample) +
+                              api_endpoints(sample)):
+        measured = measure_endpoint(client, url, params, repeat)
+        if measured is not None:
+            results['endpoints'][name] = dict(measured, url=url)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Изменение медианы и числа запросов относительно baseline."""
+    rows = {}
+    for name, current in results['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+        rows[name] = {
+            'p50_ratio': round(current['p50_ms'] /
+                               max(before['p50_ms'], 0.001), 2),
+            'queries': f'{before["queries_cold"]} -> '
+                       f'{current["queries_cold"]}',
+        }
+    return {'baseline': baseline.get('commit'), 'endpoints': rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--likes', type=int, default=50000)
+    parser.add_argument('--follows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='запросов к каждому эндпоинту')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--compare', help='JSON прошлого запуска')
+    args = parser.parse_args()
+    sizes = {name: getattr(args, name) for name in (
+        'users', 'groups', 'posts', 'comments', 'likes', 'follows')}
+    setup_django()
+    with temporary_database(on_disk=True):
+        results = run(sizes, args.repeat, random.Random(args.seed))
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            results['comparison'] = compare(results, json.load(file))
+    output = json.dumps(results, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Нагрузка на запись: параллельные лайки и комментарии.
+
+Каждый поток входит своим пользователем и по очереди ставит лайки
+и оставляет комментарии к случайным постам через обычные вьюхи.
+Считаются пропускная способность и ошибки (например, «database is
+locked» у SQLite без WAL).
+
+    python -m benchmarks.bench_writes --threads 8 --requests 200
+    DB_ENGINE=postgresql python -m benchmarks.bench_writes
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+
+from benchmarks.common import setup_django, temporary_database
+
+
+def seed(users, posts):
+    from posts.models import Post, User
+    author = User.objects.create_user(username='bench')
+    Post.objects.bulk_create(
+        Post(text=f'Бенчмарк {number}', author=author)
+        for number in range(posts)
+    )
+    readers = [User.objects.create_user(username=f'reader{number}')
+               for number in range(users)]
+    return readers, list(Post.objects.values_list('pk', flat=True))
+
+
+def worker(user, post_ids, requests, results):
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    client.force_login(user)
+    errors = 0
+    timings = []
+    try:
+        for number in range(requests):
+            kwargs = {'username': 'bench',
+                      'post_id': random.choice(post_ids)}
+            start = time.perf_counter()
+            try:
+                if number % 2:
+                    response = client.post(
+                        reverse('add_comment', kwargs=kwargs),
+                        {'text': f'Комментарий {number}'})
+                else:
+                    response = client.get(reverse('post_like', kwargs=kwargs))
+                if response.status_code != 302:
+                    errors += 1
+            except Exception:
+                errors += 1
+            timings.append(time.perf_counter() - start)
+    finally:
+        # Иначе соединение потока не даст удалить тестовую базу.
+        connection.close()
+    results.append((timings, errors))
+
+
+def run(threads, requests, posts):
+    from django.db import connection
+
+    from posts.models import Comment, Like
+
+    # Ошибки считаются в сводке, трейсбеки каждой из них не нужны.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    users, post_ids = seed(threads, posts)
+    results = []
+    workers = [
+        threading.Thread(target=worker,
+                         args=(user, post_ids, requests, results))
+        for user in users
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    timings = sorted(t for thread_timings, _ in results
+                     for t in thread_timings)
+    return {
+        'engine': connection.vendor,
+        'threads': threads,
+        'requests': len(timings),
+        'errors': sum(errors for _, errors in results),
+        'rps': round(len(timings) / elapsed, 1),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+        'likes': Like.objects.count(),
+        'comments': Comment.objects.count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='запросов на поток')
+    parser.add_argument('--posts', type=int, default=100)
+    args = parser.parse_args()
+    setup_django()
+    with temporary_database(on_disk=True):
+        results = run(args.threads, args.requests, args.posts)
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
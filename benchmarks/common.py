@@ -0,0 +1,79 @@
+"""Общие утилиты бенчмарков: настройка Django, временная БД, замеры.
+
+Бенчмарки запускаются из корня проекта как модули, например
+``python -m benchmarks.bench_pagination``, и работают на отдельной
+тестовой базе, не трогая рабочую.
+"""
+import contextlib
+import math
+import os
+import statistics
+import tempfile
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def temporary_database(on_disk=False):
+    """Тестовая БД на время бенчмарка.
+
+    on_disk=True для SQLite создаёт базу в файле, а не в памяти:
+    иначе многопоточные замеры не отражают работу журнала и блокировок.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        override_settings,
+        setup_test_environment,
+        teardown_test_environment,
+    )
+    if on_disk and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            tempfile.mkdtemp(), 'bench.sqlite3')
+    # Как в manage.py test: без DEBUG, чтобы не мерить debug_toolbar,
+    # и с превью картинок без фоновых потоков.
+    setup_test_environment(debug=False)
+    thumbnails = override_settings(THUMBNAIL_WORKERS=0)
+    thumbnails.enable()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        thumbnails.disable()
+        teardown_test_environment()
+
+
+def percentiles(timings):
+    """Процентили времени в миллисекундах по замерам в секундах."""
+    timings = sorted(timings)
+
+    def rank(q):
+        return timings[max(math.ceil(q * len(timings)) - 1, 0)]
+
+    return {
+        'p50_ms': round(rank(0.5) * 1000, 3),
+        'p90_ms': round(rank(0.9) * 1000, 3),
+        'p99_ms': round(rank(0.99) * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3),
+    }
+
+
+def measure(func, repeat=20):
+    """Время выполнения func в миллисекундах: медиана, p95, максимум."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
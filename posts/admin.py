@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
@@ -8,6 +9,17 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    # Больше совпадений админке показывать незачем.
+    search_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.backend():
+            return super().get_search_results(
+                request, queryset, search_term)
+        # Вместо LIKE '%...%' по всей таблице — поисковый индекс.
+        ranked = search.search(search_term, queryset).ranked_ids(
+            0, self.search_limit)
+        return queryset.filter(pk__in=[pk for pk, _ in ranked]), False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -0,0 +1,160 @@
+"""Инвалидация закэшированных фрагментов по событиям.
+
+Каждой области (лента, группа, автор) соответствует «поколение» —
+отметка времени последнего изменения в наносекундах. Поколение входит
+в ключ фрагмента, поэтому после bump() старые фрагменты просто
+перестают запрашиваться и вытесняются по TTL.
+
+Анонимным посетителям страницы лент и постов отдаются целиком из кэша
+(anonymous_page): ключ — путь с параметрами и поколения областей
+страницы, так что изменение поста в группе сбрасывает страницы этой
+группы, но не чужие. Счётчики лайков и подписчиков на закэшированной
+странице устаревают не дольше чем на PAGE_CACHE_TIMEOUT секунд.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+INDEX = 'index'
+POSTS = 'posts'
+# Правка комментария меняет выдачу поиска, но не список постов.
+SEARCH = 'search'
+POST_FRAGMENT = 'post_item'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def comments_scope(post_id):
+    return f'comments:{post_id}'
+
+
+def _key(scope):
+    return f'generation:{scope}'
+
+
+def generations(*scopes):
+    keys = [_key(scope) for scope in scopes]
+    stored = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in stored}
+    for key, value in missing.items():
+        # add() не перезапишет поколение, выставленное другим процессом.
+        if not cache.add(key, value, None):
+            value = cache.get(key, value)
+        stored[key] = value
+    return [stored[key] for key in keys]
+
+
+def bump(*scopes):
+    keys = [_key(scope) for scope in scopes]
+    stored = cache.get_many(keys)
+    now = time.time_ns()
+    cache.set_many(
+        {key: max(now, stored.get(key, 0) + 1) for key in keys}, None)
+
+
+def forget_post(post_id):
+    cache.delete(make_template_fragment_key(POST_FRAGMENT, [post_id]))
+
+
+def bump_on_commit(*scopes, post_id=None):
+    def invalidate():
+        bump(*scopes)
+        if post_id is not None:
+            forget_post(post_id)
+
+    # Второй раз — после коммита, чтобы фрагмент или ETag, полученные
+    # по ещё не закоммиченным данным, не пережили изменение.
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def invalidate_post(post, *group_slugs):
+    scopes = [INDEX, author_scope(post.author.username),
+              POSTS, post_scope(post.pk)]
+    scopes += [group_scope(slug) for slug in group_slugs if slug]
+    bump_on_commit(*scopes, post_id=post.pk)
+
+
+def feed_cache_key(request, page, *scopes):
+    """Ключ фрагмента страницы ленты для тега {% cache %}.
+
+    Учитывает номер страницы или курсор и поколения областей. Ссылки
+    на редактирование видны только автору, поэтому для автора одного
+    из постов страницы ключ свой, а остальные зрители делят общий.
+    """
+    token = request.GET.get('cursor') or request.GET.get('page') or '1'
+    user_id = request.user.pk if request.user.is_authenticated else None
+    editor = user_id if any(
+        post.author_id == user_id for post in page) else 0
+    parts = [*scopes, *map(str, generations(*scopes)), token, str(editor)]
+    return ':'.join(parts)
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 30)
+
+
+def page_cache_key(request, *scopes):
+    parts = [request.get_full_path(), *scopes,
+             *map(str, generations(*scopes))]
+    digest = hashlib.md5(':'.join(parts).encode()).hexdigest()
+    return f'page:{digest}'
+
+
+def anonymous_page(scopes):
+    """Кэширует ответ вьюхи для анонимных посетителей.
+
+    scopes(**kwargs) получает аргументы вьюхи из адреса и возвращает
+    области, при изменении которых страница устаревает. Вошедшие
+    пользователи видят свои ссылки и формы — для них страница всегда
+    строится заново и помечается как private.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = page_timeout()
+            if (request.user.is_authenticated or not timeout or
+                    request.method not in ('GET', 'HEAD')):
+                response = view(request, *args, **kwargs)
+                patch_cache_control(response, private=True)
+                return response
+            key = page_cache_key(request, *scopes(**kwargs))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Page-Cache'] = 'hit'
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.cookies:
+                    return response
+                cache.set(key, (response.content, response['Content-Type']),
+                          timeout)
+                response['X-Page-Cache'] = 'miss'
+            # Для CDN: ответ общий, но вошедшим нужен другой.
+            patch_cache_control(response, public=True, max_age=timeout)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,131 @@
+"""Денормализованные счётчики лайков, комментариев, постов и подписок.
+
+Счётчики меняются атомарными UPDATE ... SET x = x + n в той же
+транзакции, что и сама запись; recount_* пересчитывают их с нуля.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import trending
+from .models import Comment, Follow, Like, Post, User, UserStats
+
+POST_COUNTERS = {
+    'likes_count': (Like, 'post'),
+    'comments_count': (Comment, 'post'),
+}
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def count_subquery(model, field):
+    rows = (model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(count=Count('pk'))
+            .values('count'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _increments(deltas):
+    return {
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items() if delta
+    }
+
+
+def change_post_counters(post_id, hot=0, **deltas):
+    """hot — вес события для рейтинга популярности (posts/trending.py)."""
+    updates = _increments(deltas)
+    if hot:
+        updates.update(trending.score_updates(hot))
+    if updates:
+        Post.objects.filter(pk=post_id).update(**updates)
+
+
+def change_user_stats(user_id, **deltas):
+    change_users_stats([user_id], **deltas)
+
+
+def change_users_stats(user_ids, **deltas):
+    # Строки статистики ещё может не быть: тогда она будет посчитана
+    # с нуля при первом чтении, см. get_user_stats.
+    updates = _increments(deltas)
+    if updates:
+        UserStats.objects.filter(user_id__in=user_ids).update(**updates)
+
+
+def get_user_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        recount_user_stats(User.objects.filter(pk=user.pk))
+        return UserStats.objects.get(user=user)
+
+
+def _expected(queryset, counters):
+    return queryset.annotate(**{
+        f'expected_{field}': count_subquery(model, related)
+        for field, (model, related) in counters.items()
+    })
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def recount_posts(queryset=None, batch_size=500, dry_run=False):
+    """Исправляет расхождения счётчиков постов, возвращает их число."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    drift = Q()
+    for field in POST_COUNTERS:
+        drift |= ~Q(**{field: F(f'expected_{field}')})
+    posts = _expected(queryset.order_by(), POST_COUNTERS).filter(
+        drift).only('pk', *POST_COUNTERS)
+    fixed = 0
+    for batch in _batches(posts.iterator(), batch_size):
+        for post in batch:
+            for field in POST_COUNTERS:
+                setattr(post, field, getattr(post, f'expected_{field}'))
+        if not dry_run:
+            Post.objects.bulk_update(batch, list(POST_COUNTERS))
+        fixed += len(batch)
+    return fixed
+
+
+def recount_user_stats(queryset=None, batch_size=500, dry_run=False):
+    """Создаёт недостающую и исправляет устаревшую статистику
+    пользователей, возвращает число исправленных строк."""
+    if queryset is None:
+        queryset = User.objects.all()
+    rows = _expected(queryset.order_by(), USER_COUNTERS).values(
+        'pk', *(f'expected_{field}' for field in USER_COUNTERS))
+    fixed = 0
+    for batch in _batches(rows.iterator(), batch_size):
+        current = UserStats.objects.in_bulk([row['pk'] for row in batch])
+        missing, drifted = [], []
+        for row in batch:
+            values = {
+                field: row[f'expected_{field}'] for field in USER_COUNTERS
+            }
+            stats = current.get(row['pk'])
+            if stats is None:
+                missing.append(UserStats(user_id=row['pk'], **values))
+            elif any(getattr(stats, field) != value
+                     for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(stats, field, value)
+                drifted.append(stats)
+        if not dry_run:
+            UserStats.objects.bulk_create(missing, ignore_conflicts=True)
+            UserStats.objects.bulk_update(drifted, list(USER_COUNTERS))
+        fixed += len(missing) + len(drifted)
+    return fixed
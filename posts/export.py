@@ -0,0 +1,157 @@
+"""Потоковая выгрузка постов, комментариев, лайков и подписок.
+
+Строки читаются из базы пачками по EXPORT_CHUNK_SIZE
+(QuerySet.iterator, на PostgreSQL — серверный курсор) и сразу уходят
+в ответ StreamingHttpResponse или в файл команды export_data, так что
+память не зависит от размера таблицы. Форматы — ndjson (объект JSON на
+строку) и CSV.
+
+Выгрузка по частям: since оставляет посты и комментарии не старше
+заданной даты, after_id — записи с id больше заданного (у лайков и
+подписок дат нет, для них это единственный способ). Записи идут по
+возрастанию id: последний выгруженный id — начало следующей выгрузки.
+"""
+import csv
+import datetime
+import json
+
+from django.conf import settings
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from yatube.metrics import check_access
+
+from .models import Comment, Follow, Like, Post
+
+# Таблица: (модель, поле даты для since, ((колонка, поле модели), ...)).
+TABLES = {
+    'posts': (Post, 'pub_date', (
+        ('id', 'id'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+        ('image', 'image'),
+        ('likes_count', 'likes_count'),
+        ('comments_count', 'comments_count'),
+    )),
+    'comments': (Comment, 'created', (
+        ('id', 'id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+    'likes': (Like, None, (
+        ('id', 'id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+    )),
+    'follows': (Follow, None, (
+        ('id', 'id'),
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def columns(table):
+    return [name for name, _ in TABLES[table][2]]
+
+
+def parse_since(value):
+    """Дата или дата со временем в ISO 8601; без часового пояса —
+    в поясе сайта."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is not None:
+                moment = datetime.datetime.combine(day, datetime.time.min)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValueError(f'Некорректная дата: {value}')
+    if settings.USE_TZ and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def rows(table, since=None, after_id=None, chunk=None):
+    """Кортежи значений колонок таблицы по возрастанию id.
+
+    Запрос выполняется при первом обращении к результату.
+    """
+    model, date_field, fields = TABLES[table]
+    queryset = model.objects.all()
+    if since is not None:
+        if date_field is None:
+            raise ValueError(f'У таблицы {table} нет даты, '
+                             f'выгружайте по after_id')
+        queryset = queryset.filter(**{f'{date_field}__gte': since})
+    if after_id is not None:
+        queryset = queryset.filter(id__gt=after_id)
+    return queryset.order_by('id').values_list(
+        *[field for _, field in fields]).iterator(
+        chunk_size=chunk or chunk_size())
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson(table, records):
+    names = columns(table)
+    for record in records:
+        yield json.dumps(dict(zip(names, map(_value, record))),
+                         ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку, а не пишет её."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(table, records):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns(table))
+    for record in records:
+        yield writer.writerow(map(_value, record))
+
+
+WRITERS = {'ndjson': ndjson, 'csv': csv_lines}
+
+
+def export(request, table):
+    check_access(request, 'EXPORT_TOKEN')
+    if table not in TABLES:
+        raise Http404
+    output = request.GET.get('format', 'ndjson')
+    if output not in WRITERS:
+        return HttpResponseBadRequest(f'Неизвестный формат: {output}')
+    try:
+        since = request.GET.get('since')
+        after_id = request.GET.get('after_id')
+        records = rows(table,
+                       since=parse_since(since) if since else None,
+                       after_id=int(after_id) if after_id else None)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(WRITERS[output](table, records),
+                                     content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{output}"')
+    return response
@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Comment, Post
+from .uploads import limit_image_field
 
 
 class PostForm(forms.ModelForm):
@@ -10,6 +11,12 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Поле остаётся обычным ImageField, лимиты проверяются до
+        # того, как оно откроет картинку.
+        limit_image_field(self.fields['image'])
+
 
 class CommentForm(forms.ModelForm):
 
@@ -0,0 +1,196 @@
+"""Лайки одной командой SQL.
+
+like() — INSERT ... SELECT с пропуском конфликта по unique_like:
+повторный или параллельный лайк ничего не вставит, а число вставленных
+строк (0 или 1) говорит, надо ли менять счётчик likes_count и рейтинг
+популярности. unlike() — такой же DELETE. Счётчики меняются в той же
+транзакции, без сигналов модели Like.
+
+При LIKE_BUFFER_SIZE > 0 лайки и их отмены копятся в памяти процесса:
+от серии «лайк — отмена — лайк» одного пользователя остаётся последнее
+состояние, а в базу буфер пишется пачкой — по заполнении или через
+LIKE_BUFFER_INTERVAL секунд. Счётчики затронутых постов при этом
+пересчитываются по таблице лайков, поэтому остаются точными и при
+нескольких процессах. Цена — лайк виден остальным с задержкой до
+сброса буфера; сам пользователь видит свой (см. pending). При обычном
+завершении процесса буфер сбрасывается (atexit), а при аварийном
+(SIGKILL, падение интерпретатора) накопленное теряется.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+
+from . import trending
+from .counters import change_post_counters, count_subquery
+from .models import Like, Post, User
+from .signals import post_counters_changed
+
+
+def buffer_size():
+    return getattr(settings, 'LIKE_BUFFER_SIZE', 0)
+
+
+def buffer_interval():
+    return getattr(settings, 'LIKE_BUFFER_INTERVAL', 1.0)
+
+
+def _changed(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        likes_count=count_subquery(Like, 'post'),
+        **trending.score_updates(trending.LIKE * delta))
+    post_counters_changed(post_id)
+
+
+def _like_sql(connection, author_username):
+    ops, meta = connection.ops, Like._meta
+    post_table = ops.quote_name(Post._meta.db_table)
+    sql = (f'{ops.insert_statement(ignore_conflicts=True)} '
+           f'{ops.quote_name(meta.db_table)} '
+           f'({ops.quote_name(meta.get_field("post").column)}, '
+           f'{ops.quote_name(meta.get_field("author").column)}) '
+           f'SELECT {post_table}.id, %s FROM {post_table} '
+           f'WHERE {post_table}.id = %s')
+    if author_username is not None:
+        sql += (f' AND {post_table}.author_id = (SELECT id FROM '
+                f'{ops.quote_name(User._meta.db_table)} WHERE username = %s)')
+    return f'{sql} {ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+
+
+def _unlike_sql(connection):
+    ops, meta = connection.ops, Like._meta
+    return (f'DELETE FROM {ops.quote_name(meta.db_table)} '
+            f'WHERE {ops.quote_name(meta.get_field("post").column)} = %s '
+            f'AND {ops.quote_name(meta.get_field("author").column)} = %s')
+
+
+def _write(post_id, user_id, liked, author_username=None):
+    using = router.db_for_write(Like)
+    connection = connections[using]
+    if liked:
+        params = [user_id, post_id]
+        if author_username is not None:
+            params.append(author_username)
+        sql = _like_sql(connection, author_username)
+    else:
+        sql, params = _unlike_sql(connection), [post_id, user_id]
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            changed = cursor.rowcount == 1
+        if changed:
+            delta = 1 if liked else -1
+            change_post_counters(post_id, likes_count=delta,
+                                 hot=trending.LIKE * delta)
+            post_counters_changed(post_id)
+    return changed
+
+
+def like(post_id, user_id, author_username=None):
+    """Ставит лайк. True — поставлен сейчас, False — уже стоял или
+    поста нет (у автора author_username, если он задан), None —
+    отложен в буфер."""
+    if buffer_size():
+        buffer.add(post_id, user_id, True)
+        return None
+    return _write(post_id, user_id, True, author_username)
+
+
+def unlike(post_id, user_id):
+    """Снимает лайк; результат — как у like()."""
+    if buffer_size():
+        buffer.add(post_id, user_id, False)
+        return None
+    return _write(post_id, user_id, False)
+
+
+def pending(post_id, user_id):
+    """Состояние лайка, ещё не записанное из буфера, или None."""
+    return buffer.pending.get((post_id, user_id))
+
+
+def is_liked(post_id, user_id):
+    state = pending(post_id, user_id)
+    if state is not None:
+        return state
+    return Like.objects.filter(post_id=post_id, author_id=user_id).exists()
+
+
+def apply(states):
+    """Записывает {(post_id, user_id): лайк стоит} пачкой, возвращает
+    {post_id: изменение числа лайков}."""
+    if not states:
+        return {}
+    post_ids = {post_id for post_id, _ in states}
+    user_ids = {user_id for _, user_id in states}
+    with transaction.atomic(using=router.db_for_write(Like)):
+        existing = set(Like.objects.filter(
+            post_id__in=post_ids, author_id__in=user_ids).values_list(
+            'post_id', 'author_id'))
+        posts = set(Post.objects.filter(pk__in=post_ids).values_list(
+            'pk', flat=True))
+        added = [pair for pair, liked in states.items()
+                 if liked and pair not in existing and pair[0] in posts]
+        removed = [pair for pair, liked in states.items()
+                   if not liked and pair in existing]
+        Like.objects.bulk_create(
+            [Like(post_id=post_id, author_id=user_id)
+             for post_id, user_id in added], ignore_conflicts=True)
+        if removed:
+            connection = connections[router.db_for_write(Like)]
+            with connection.cursor() as cursor:
+                cursor.executemany(_unlike_sql(connection), removed)
+        deltas = {}
+        for post_id, _ in added:
+            deltas[post_id] = deltas.get(post_id, 0) + 1
+        for post_id, _ in removed:
+            deltas[post_id] = deltas.get(post_id, 0) - 1
+        for post_id, delta in deltas.items():
+            if delta:
+                _changed(post_id, delta)
+    return deltas
+
+
+class LikeBuffer:
+    """Последние состояния лайков, ещё не записанные в базу."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer = None
+        self.pending = {}
+
+    def add(self, post_id, user_id, liked):
+        with self._lock:
+            self.pending[(post_id, user_id)] = liked
+            full = len(self.pending) >= buffer_size()
+            if not full and self._timer is None:
+                self._timer = threading.Timer(buffer_interval(),
+                                              self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Пишет накопленное в базу, возвращает число записей буфера."""
+        with self._lock:
+            states = self.pending
+            self.pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        apply(states)
+        return len(states)
+
+    def _flush_in_thread(self):
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            for connection in connections.all():
+                connection.close()
+
+
+buffer = LikeBuffer()
+atexit.register(buffer.flush)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import tags
+
+
+class Command(BaseCommand):
+    help = ('Разбирает теги и упоминания в уже опубликованных постах, '
+            'проходя таблицу постов пачками по --batch-size.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=tags.BATCH_SIZE,
+            help='Сколько постов читать и разбирать за раз.',
+        )
+        parser.add_argument(
+            '--start', type=int, default=0,
+            help='Начать с постов, чей id больше указанного '
+                 '(продолжить прерванный проход).',
+        )
+
+    def handle(self, *args, batch_size, start, **options):
+        processed = tags.backfill(batch_size, start)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {processed}'
+        ))
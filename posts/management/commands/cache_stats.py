@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша по префиксам ключей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить накопленную статистику.',
+        )
+
+    def handle(self, *args, reset, **options):
+        if not hasattr(cache, 'stats'):
+            raise CommandError(
+                'Статистика доступна только для yatube.cache.InstrumentedCache'
+            )
+        if reset:
+            cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Статистика обнулена'))
+            return
+        stats = cache.stats()
+        if not stats:
+            self.stdout.write('Статистики пока нет')
+            return
+        self.stdout.write(
+            f'{"префикс":<40} {"попадания":>10} {"промахи":>10} {"доля":>6}')
+        for prefix, counts in sorted(stats.items()):
+            total = counts['hits'] + counts['misses']
+            ratio = counts['hits'] / total if total else 0
+            self.stdout.write(
+                f'{prefix:<40} {counts["hits"]:>10} '
+                f'{counts["misses"]:>10} {ratio:>6.1%}')
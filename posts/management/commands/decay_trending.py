@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг популярности недавно активных постов '
+            'к текущей эпохе и обнуляет остывшие. Запускать по cron '
+            'раз в TRENDING_PERIOD секунд.')
+
+    def handle(self, *args, **options):
+        decayed, cooled = trending.decay()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано постов: {decayed}, остыло: {cooled}'
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает таблицу постов, комментариев, лайков или подписок '
+            'в ndjson или CSV, читая базу пачками по --chunk-size.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(export.TABLES))
+        parser.add_argument(
+            '--format', choices=sorted(export.WRITERS), default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Только посты и комментарии не старше даты (ISO 8601).',
+        )
+        parser.add_argument(
+            '--after-id', type=int,
+            help='Только записи с id больше указанного '
+                 '(продолжить прошлую выгрузку).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.chunk_size(),
+            help='Сколько строк читать из базы за раз.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, по умолчанию — стандартный вывод.',
+        )
+
+    def handle(self, *args, table, since, after_id, chunk_size, output,
+               **options):
+        try:
+            records = export.rows(
+                table,
+                since=export.parse_since(since) if since else None,
+                after_id=after_id,
+                chunk=chunk_size)
+        except ValueError as error:
+            raise CommandError(error)
+        lines = export.WRITERS[options['format']](table, records)
+        if output == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as file:
+            file.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(f'Выгружено в {output}'))
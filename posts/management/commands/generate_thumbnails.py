@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _generate(post_id):
+    try:
+        return thumbnails.generate(post_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Заранее строит варианты картинок существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Сколько картинок обрабатывать параллельно.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить и уже готовые варианты.',
+        )
+
+    def handle(self, *args, workers, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            posts = posts.filter(image_variants='')
+        post_ids = posts.values_list('pk', flat=True).iterator()
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_generate, post_ids))
+        else:
+            results = [thumbnails.generate(post_id) for post_id in post_ids]
+        done = sum(results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {done}, ошибок: {len(results) - done}'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = ('Заново строит поисковый индекс по всем постам и '
+            'комментариям, пачками по --batch-size записей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=search.BATCH_SIZE,
+            help='Сколько записей читать и индексировать за раз.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if not search.backend():
+            raise CommandError(
+                'Полнотекстовый индекс поддерживается только для '
+                'SQLite и PostgreSQL.')
+        with transaction.atomic():
+            posts, comments = search.rebuild(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {posts}, комментариев: {comments}'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает материализованные ленты подписок: ленту '
+            'каждого пользователя собирает заново по его подпискам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить все записи лент одним запросом перед '
+                 'перестройкой.',
+        )
+
+    def handle(self, *args, clear, **options):
+        if clear:
+            TimelineEntry.objects.all().delete()
+        else:
+            # Ленты тех, у кого подписок больше нет.
+            TimelineEntry.objects.exclude(
+                user_id__in=Follow.objects.values('user_id')).delete()
+        users = Follow.objects.order_by('user_id').values_list(
+            'user_id', flat=True).distinct()
+        rebuilt = 0
+        for user_id in list(users):
+            with transaction.atomic():
+                timeline.rebuild(user_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты перестроены для пользователей: {rebuilt}'
+        ))
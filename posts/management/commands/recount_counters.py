@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_posts, recount_user_stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики лайков, комментариев, постов '
+            'и подписок и исправляет расхождения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько строк обновлять за один запрос.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать число расхождений.',
+        )
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        posts = recount_posts(batch_size=batch_size, dry_run=dry_run)
+        users = recount_user_stats(batch_size=batch_size, dry_run=dry_run)
+        verb = 'Найдено' if dry_run else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} расхождений: постов {posts}, пользователей {users}'
+        ))
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.24 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+def delete_duplicates(model, fields):
+    """Оставляет по одной строке на каждую пару fields, возвращает
+    пары, в которых что-то удалили."""
+    duplicates = (model.objects.order_by().values(*fields)
+                  .annotate(keep=models.Min('pk'), rows=models.Count('pk'))
+                  .filter(rows__gt=1))
+    affected = []
+    for row in duplicates:
+        pair = {field: row[field] for field in fields}
+        model.objects.filter(**pair).exclude(pk=row['keep']).delete()
+        affected.append(pair)
+    return affected
+
+
+def deduplicate(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    for pair in delete_duplicates(Like, ['post', 'author']):
+        Post.objects.filter(pk=pair['post']).update(
+            likes_count=Like.objects.filter(post=pair['post']).count())
+    for pair in delete_duplicates(Follow, ['user', 'author']):
+        UserStats.objects.filter(user=pair['author']).update(
+            followers_count=Follow.objects.filter(
+                author=pair['author']).count())
+        UserStats.objects.filter(user=pair['user']).update(
+            following_count=Follow.objects.filter(
+                user=pair['user']).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='like',
+            constraint=models.UniqueConstraint(fields=('post', 'author'), name='unique_like'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 2.2.24 on 2026-10-18 15:10
+
+from django.db import migrations
+
+TABLE = 'posts_search'
+BATCH_SIZE = 500
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements = [
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5(body, "
+            "post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+        ]
+        insert = (f'INSERT INTO {TABLE} (rowid, post_id, body) '
+                  'VALUES (%s, %s, %s)')
+    elif connection.vendor == 'postgresql':
+        statements = [
+            f'CREATE TABLE {TABLE} (id bigint PRIMARY KEY, '
+            'post_id integer NOT NULL, body text NOT NULL, '
+            'document tsvector NOT NULL)',
+            f'CREATE INDEX {TABLE}_document_idx ON {TABLE} '
+            'USING GIN (document)',
+            f'CREATE INDEX {TABLE}_post_id_idx ON {TABLE} (post_id)',
+        ]
+        insert = (f'INSERT INTO {TABLE} (id, post_id, body, document) '
+                  "VALUES (%s, %s, %s, to_tsvector('russian', %s))")
+    else:
+        return
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        sources = (
+            (Post.objects.values_list('pk', 'pk', 'text'), 0),
+            (Comment.objects.values_list('pk', 'post_id', 'text'), 1),
+        )
+        for rows, kind in sources:
+            batch = []
+            for pk, post_id, text in rows.order_by('pk').iterator():
+                row = (2 * pk + kind, post_id, text)
+                if connection.vendor == 'postgresql':
+                    row += (text,)
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    cursor.executemany(insert, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(insert, batch)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
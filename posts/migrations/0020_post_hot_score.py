@@ -0,0 +1,27 @@
+# Generated by Django 2.2.24 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_epoch',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Эпоха рейтинга'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_score_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from . import variants
+
 User = get_user_model()
 
 
@@ -28,6 +30,13 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        """Всё, что нужно шаблону post_item.html, одним запросом."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст',
@@ -56,15 +65,60 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
         null=True)
+    # Готовые варианты картинки (см. posts/variants.py), заполняются
+    # фоновым обработчиком из posts/thumbnails.py; пока пусто — заглушка.
+    image_variants = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Варианты картинки',
+    )
+    likes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Лайков',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+    )
+    # Рейтинг популярности на начало эпохи hot_epoch, см. posts/trending.py.
+    hot_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг популярности',
+    )
+    hot_epoch = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Эпоха рейтинга',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name_plural = 'Посты'
         verbose_name = 'пост'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_id_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['-hot_score', '-id'],
+                         name='post_hot_score_idx'),
+        ]
 
     def __str__(self):
         return f'{self.text[:15]} @{self.author} #{self.group} {self.pub_date}'
 
+    @property
+    def image_variant_urls(self):
+        return variants.urls(self.image_variants)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -91,6 +145,10 @@ class Comment(models.Model):
         ordering = ('-created',)
         verbose_name_plural = 'Комментарии'
         verbose_name = 'Комментарий'
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return (f'{self.text[:15]} @{self.author} '
@@ -112,6 +170,10 @@ class Follow (models.Model):
     class Meta:
         verbose_name_plural = 'Подписки'
         verbose_name = 'Подписка'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
 
     def __str__(self):
         return f'@Подписчик {self.user} @Автор {self.author}'
@@ -129,6 +191,162 @@ class Like (models.Model):
         verbose_name="Автор",
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'author'],
+                                    name='unique_like'),
+        ]
+
     def __str__(self):
         return (f'@{self.author} '
                 f'{self.post.text[:15]}')
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Записей',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок',
+    )
+
+    class Meta:
+        verbose_name_plural = 'Статистика пользователей'
+        verbose_name = 'Статистика пользователя'
+
+    def __str__(self):
+        return (f'@{self.user} записей {self.posts_count} '
+                f'подписчиков {self.followers_count}')
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name_plural = 'Ленты подписок'
+        verbose_name = 'Запись ленты подписок'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'@{self.user} {self.post_id} {self.pub_date}'
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Тег',
+        help_text='Без решётки, в нижнем регистре',
+    )
+
+    class Meta:
+        verbose_name_plural = 'Теги'
+        verbose_name = 'Тег'
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Тег, упомянутый в тексте поста (см. posts/tags.py)."""
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост',
+    )
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег',
+    )
+    # Копия даты поста: лента тега листается по индексу этой таблицы
+    # без join с постами.
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name_plural = 'Теги постов'
+        verbose_name = 'Тег поста'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'tag'],
+                                    name='unique_post_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', '-pub_date', '-post'],
+                         name='post_tag_pub_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.tag_id} {self.post_id}'
+
+
+class Mention(models.Model):
+    """Пользователь, упомянутый в тексте поста через @username."""
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост',
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name_plural = 'Упоминания'
+        verbose_name = 'Упоминание'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'user'],
+                                    name='unique_mention'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='mention_user_pub_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'@{self.user_id} {self.post_id}'
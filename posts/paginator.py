@@ -0,0 +1,197 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# Комментарии на странице поста и в API листаются одним курсором
+# по индексу (post, created, id).
+COMMENT_ORDERING = ('created', 'id')
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (keyset) без COUNT и OFFSET.
+
+    Записи выводятся по убыванию полей ``ordering``; последнее поле
+    должно быть уникальным, чтобы порядок был однозначным.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @cached_property
+    def count(self):
+        # Считается только по требованию шаблона, сама навигация
+        # в COUNT не нуждается.
+        return self.object_list.count()
+
+    def encode_cursor(self, obj, direction):
+        values = [str(getattr(obj, name)) for name in self.ordering]
+        raw = '|'.join([direction] + values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursor('Некорректный курсор')
+        direction, *values = raw.split('|')
+        if direction not in (NEXT, PREVIOUS) or (
+                len(values) != len(self.ordering)):
+            raise InvalidCursor('Некорректный курсор')
+        model = self.object_list.model
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise InvalidCursor('Некорректный курсор')
+        if any(value is None for value in values):
+            raise InvalidCursor('Некорректный курсор')
+        return direction, values
+
+    def _keyset(self, values, lookup):
+        # (a, b) < (va, vb)  =>  a <= va AND (a < va OR (a = va AND b < vb));
+        # первое условие даёт планировщику диапазон по индексу.
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for prev_name, prev_value in zip(self.ordering[:index],
+                                             values[:index]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        range_lookup = f'{self.ordering[0]}__{lookup}e'
+        return Q(**{range_lookup: values[0]}) & condition
+
+    def fetch(self, direction, values, limit):
+        """До limit записей за курсором в порядке обхода: для NEXT —
+        по убыванию ordering, для PREVIOUS — по возрастанию."""
+        queryset = self.object_list
+        if direction == NEXT:
+            if values is not None:
+                queryset = queryset.filter(self._keyset(values, 'lt'))
+            ordering = [f'-{name}' for name in self.ordering]
+        else:
+            queryset = queryset.filter(self._keyset(values, 'gt'))
+            ordering = self.ordering
+        return list(queryset.order_by(*ordering)[:limit])
+
+    def page(self, cursor=None):
+        if not cursor:
+            direction, values = NEXT, None
+        else:
+            direction, values = self.decode_cursor(cursor)
+        rows = self.fetch(direction, values, self.per_page + 1)
+        if direction == NEXT:
+            has_next = len(rows) > self.per_page
+            has_previous = values is not None
+            rows = rows[:self.per_page]
+        else:
+            has_previous = len(rows) > self.per_page
+            has_next = True
+            rows = rows[:self.per_page][::-1]
+        return CursorPage(rows, self, has_next, has_previous)
+
+    def queryset_page(self, cursor=None):
+        """Страница вперёд, записи которой — QuerySet не длиннее
+        per_page, а не список; курсоры назад не принимаются.
+
+        Как и page, читает одним запросом на запись больше: лишняя
+        запись только сообщает, что есть следующая страница.
+        """
+        values = None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            if direction != NEXT:
+                raise InvalidCursor('Некорректный курсор')
+        fetched = self.fetch(NEXT, values, self.per_page + 1)
+        rows = self.object_list
+        if values is not None:
+            rows = rows.filter(self._keyset(values, 'lt'))
+        rows = rows.order_by(
+            *[f'-{name}' for name in self.ordering])[:self.per_page]
+        # QuerySet страницы заполняется уже прочитанными записями.
+        rows._result_cache = fetched[:self.per_page]
+        rows._prefetch_done = True
+        return CursorPage(rows, self, len(fetched) > self.per_page,
+                          values is not None)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+
+class CursorPage(Sequence):
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def resolve(self, object_list):
+        """Подменяет записи страницы (например, строки индексной
+        таблицы) объектами, на которые они ссылаются. Курсоры
+        считаются по исходным записям."""
+        # Обращение к cached_property запоминает курсоры до подмены.
+        self.next_cursor
+        self.previous_cursor
+        self.object_list = list(object_list)
+        return self
+
+    @cached_property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        # Записи страницы бывают QuerySet, а он не берёт индекс -1.
+        last = self.object_list[len(self.object_list) - 1]
+        return self.paginator.encode_cursor(last, NEXT)
+
+    @cached_property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+
+def paginate(request, object_list, per_page):
+    """Возвращает (paginator, page) в режиме из settings.FEED_PAGINATION."""
+    if getattr(settings, 'FEED_PAGINATION', 'page') == 'cursor':
+        paginator = CursorPaginator(object_list, per_page)
+        return paginator, paginator.get_page(request.GET.get('cursor'))
+    paginator = Paginator(object_list, per_page)
+    return paginator, paginator.get_page(request.GET.get('page'))
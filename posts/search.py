@@ -0,0 +1,223 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Индекс — отдельная таблица posts_search (создаётся миграцией 0018):
+виртуальная таблица FTS5 в SQLite, таблица с tsvector и GIN-индексом
+в PostgreSQL. Каждому посту и комментарию соответствует строка
+с id = 2 * pk для поста и 2 * pk + 1 для комментария, поэтому
+обновление и удаление строки — поиск по первичному ключу.
+
+Результат — посты, ранжированные по лучшему совпадению среди самого
+поста (вес 2) и его комментариев (вес 1).
+
+На остальных СУБД индекса нет, и поиск сводится к icontains.
+Перестроить индекс: ``python manage.py rebuild_search_index``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Comment, Post
+
+TABLE = 'posts_search'
+BATCH_SIZE = 500
+# Больше слов в запросе не учитывается.
+MAX_TERMS = 8
+
+
+def config():
+    """Словарь PostgreSQL для разбора текста на слова."""
+    return getattr(settings, 'SEARCH_CONFIG', 'russian')
+
+
+def backend():
+    vendor = connection.vendor
+    return vendor if vendor in ('sqlite', 'postgresql') else None
+
+
+def post_row_id(pk):
+    return 2 * pk
+
+
+def comment_row_id(pk):
+    return 2 * pk + 1
+
+
+def _upsert(rows):
+    """rows — тройки (id строки, id поста, текст)."""
+    rows = list(rows)
+    if not rows or not backend():
+        return
+    with connection.cursor() as cursor:
+        if backend() == 'sqlite':
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {TABLE} (rowid, post_id, body) '
+                'VALUES (%s, %s, %s)', rows)
+        else:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (id, post_id, body, document) '
+                'VALUES (%s, %s, %s, to_tsvector(%s::regconfig, %s)) '
+                'ON CONFLICT (id) DO UPDATE SET body = EXCLUDED.body, '
+                'document = EXCLUDED.document',
+                [(row_id, post_id, body, config(), body)
+                 for row_id, post_id, body in rows])
+
+
+def _delete(row_ids):
+    row_ids = list(row_ids)
+    if not row_ids or not backend():
+        return
+    column = 'rowid' if backend() == 'sqlite' else 'id'
+    placeholders = ', '.join(['%s'] * len(row_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE {column} IN ({placeholders})',
+            row_ids)
+
+
+def index_posts(posts):
+    _upsert((post_row_id(post.pk), post.pk, post.text) for post in posts)
+
+
+def index_comments(comments):
+    _upsert((comment_row_id(comment.pk), comment.post_id, comment.text)
+            for comment in comments)
+
+
+def unindex_post(pk):
+    _delete([post_row_id(pk)])
+
+
+def unindex_comment(pk):
+    _delete([comment_row_id(pk)])
+
+
+def clear():
+    if backend():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+
+def terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _match(words):
+    # Каждое слово — отдельный префиксный терм, все обязательны;
+    # кавычки и операторы из запроса в синтаксис FTS не попадают.
+    if backend() == 'sqlite':
+        return ' '.join(f'"{word}"*' for word in words)
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+class SearchResults:
+    """Найденные посты в порядке релевантности.
+
+    Поддерживает count() и срезы, поэтому подходит для
+    django.core.paginator.Paginator: каждая страница — один запрос
+    к индексу за id и один за сами посты.
+    """
+
+    def __init__(self, query, queryset):
+        self.words = terms(query)
+        self.queryset = queryset
+
+    def _from_where(self):
+        if backend() == 'sqlite':
+            sql = f'FROM {TABLE} WHERE {TABLE} MATCH %s'
+            params = [_match(self.words)]
+        else:
+            sql = (f'FROM {TABLE}, to_tsquery(%s::regconfig, %s) query '
+                   'WHERE document @@ query')
+            params = [config(), _match(self.words)]
+        if self.queryset.query.where:
+            # Фильтры вьюхи (группа и т.п.) — подзапросом по id постов.
+            subquery, subparams = self.queryset.order_by().values(
+                'pk').query.sql_with_params()
+            sql += f' AND post_id IN ({subquery})'
+            params.extend(subparams)
+        return sql, params
+
+    def count(self):
+        if not self.words:
+            return 0
+        sql, params = self._from_where()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(DISTINCT post_id) {sql}', params)
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, offset, limit):
+        """Список (id поста, ранг) от лучшего совпадения к худшему."""
+        if not self.words:
+            return []
+        sql, params = self._from_where()
+        if backend() == 'sqlite':
+            # rank в FTS5 — bm25, отрицательный: чем меньше, тем лучше.
+            score = '-MIN(rank * (2 - rowid %% 2))'
+        else:
+            score = 'MAX(ts_rank(document, query) * (2 - id %% 2))'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, {score} AS score {sql} GROUP BY post_id '
+                'ORDER BY score DESC, post_id DESC LIMIT %s OFFSET %s',
+                params + [limit, offset])
+            return cursor.fetchall()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[0:self.count()])
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        ranked = self.ranked_ids(start, item.stop - start)
+        posts = self.queryset.in_bulk([post_id for post_id, _ in ranked])
+        result = []
+        for post_id, score in ranked:
+            # Пост мог быть удалён после выборки из индекса.
+            if post_id in posts:
+                posts[post_id].search_rank = score
+                result.append(posts[post_id])
+        return result
+
+
+def search(query, queryset=None):
+    """Посты, подходящие под запрос, от самых релевантных."""
+    if queryset is None:
+        queryset = Post.objects.for_feed()
+    if backend():
+        return SearchResults(query, queryset)
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    condition = Q()
+    for word in words:
+        condition &= (Q(text__icontains=word) |
+                      Q(comments__text__icontains=word))
+    return queryset.filter(condition).distinct()
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Заново индексирует все посты и комментарии пачками по batch_size.
+
+    Возвращает (число постов, число комментариев).
+    """
+    clear()
+    counts = []
+    for model, index in ((Post, index_posts), (Comment, index_comments)):
+        fields = ('pk', 'text') + (('post_id',) if model is Comment else ())
+        indexed = last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by(
+                'pk').only(*fields)[:batch_size])
+            if not batch:
+                break
+            index(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+        counts.append(indexed)
+    return tuple(counts)
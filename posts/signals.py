@@ -0,0 +1,133 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, search, tags, thumbnails, timeline, trending
+from .counters import (
+    change_post_counters,
+    change_user_stats,
+    change_users_stats,
+)
+from .models import Comment, Follow, Like, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+def post_counters_changed(post_id, *scopes):
+    # Счётчики видны в API, но не в закэшированных фрагментах страниц.
+    cache.bump_on_commit(cache.POSTS, cache.post_scope(post_id), *scopes)
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            'group__slug', 'image', 'image_variants').first()
+        if old is None:
+            return
+        instance._old_group_slug, old_image, old_variants = old
+        # Варианты могли появиться уже после загрузки instance из базы;
+        # для новой картинки старые варианты не годятся.
+        same_image = (instance.image.name or '') == (old_image or '')
+        instance.image_variants = old_variants if same_image else ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if created:
+        change_user_stats(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+    if not raw:
+        search.index_posts([instance])
+        tags.sync(instance, created)
+        cache.invalidate_post(
+            instance,
+            instance.group.slug if instance.group_id else None,
+            getattr(instance, '_old_group_slug', None),
+        )
+        if instance.image and not instance.image_variants:
+            thumbnails.schedule(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_user_stats(instance.author_id, posts_count=-1)
+    search.unindex_post(instance.pk)
+    cache.invalidate_post(
+        instance, instance.group.slug if instance.group_id else None)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        search.index_comments([instance])
+    if created:
+        change_post_counters(instance.post_id, comments_count=1,
+                             hot=trending.COMMENT)
+        post_counters_changed(instance.post_id,
+                              cache.comments_scope(instance.post_id))
+    else:
+        cache.bump_on_commit(cache.comments_scope(instance.post_id),
+                             cache.SEARCH)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_post_counters(instance.post_id, comments_count=-1,
+                         hot=-trending.COMMENT)
+    search.unindex_comment(instance.pk)
+    post_counters_changed(instance.post_id,
+                          cache.comments_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+    if created:
+        change_post_counters(instance.post_id, likes_count=1,
+                             hot=trending.LIKE)
+        post_counters_changed(instance.post_id)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    change_post_counters(instance.post_id, likes_count=-1,
+                         hot=-trending.LIKE)
+    post_counters_changed(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_user_stats(instance.author_id, followers_count=1)
+        change_user_stats(instance.user_id, following_count=1)
+        timeline.followed(instance.user_id, instance.author_id)
+        cache.bump(cache.follow_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_user_stats(instance.author_id, followers_count=-1)
+    change_user_stats(instance.user_id, following_count=-1)
+    timeline.unfollowed(instance.user_id, instance.author_id)
+    cache.bump(cache.follow_scope(instance.user_id))
+
+
+# bulk_create не посылает сигналы, поэтому массовые вставки
+# обновляют счётчики и ленты сами, одним запросом на всю пачку.
+
+def comments_bulk_created(post_id, comments):
+    change_post_counters(post_id, comments_count=len(comments),
+                         hot=trending.COMMENT * len(comments))
+    search.index_comments(comments)
+    post_counters_changed(post_id, cache.comments_scope(post_id))
+
+
+def follows_bulk_created(user_id, author_ids):
+    change_users_stats(author_ids, followers_count=1)
+    change_user_stats(user_id, following_count=len(author_ids))
+    for author_id in author_ids:
+        timeline.followed(user_id, author_id)
+    cache.bump(cache.follow_scope(user_id))
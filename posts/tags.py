@@ -0,0 +1,119 @@
+"""Теги (#тег) и упоминания (@username) в текстах постов.
+
+При сохранении поста они разбираются в таблицы PostTag и Mention с
+копией даты публикации, поэтому лента тега — диапазон по индексу
+(tag, pub_date, post) без просмотра текстов. Для постов, написанных
+до появления тегов: ``python manage.py backfill_tags``.
+"""
+import re
+
+from django.db import transaction
+
+from .models import Mention, Post, PostTag, Tag, User
+from .paginator import CursorPaginator
+
+BATCH_SIZE = 500
+TAG_RE = re.compile(r'(?<![\w&#])#(\w{1,100})')
+# Имя пользователя Django: буквы, цифры и @.+-_; точка и дефис в
+# конце — скорее знак препинания после упоминания.
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{0,149}\w)')
+
+
+def extract_tags(text):
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def extract_mentions(text):
+    return set(MENTION_RE.findall(text))
+
+
+def get_tags(names):
+    """{имя: Tag}, недостающие теги создаются одним запросом."""
+    names = set(names)
+    if not names:
+        return {}
+    tags = Tag.objects.in_bulk(names, field_name='name')
+    missing = names - set(tags)
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags = Tag.objects.in_bulk(names, field_name='name')
+    return tags
+
+
+def user_ids(usernames):
+    if not usernames:
+        return {}
+    return dict(User.objects.filter(username__in=usernames).values_list(
+        'username', 'pk'))
+
+
+def sync(post, created=False):
+    """Приводит теги и упоминания поста в соответствие с его текстом.
+
+    Для нового поста связей ещё нет, и сверять с базой нечего.
+    """
+    tag_ids = {tag.pk for tag in get_tags(extract_tags(post.text)).values()}
+    mentioned = set(user_ids(extract_mentions(post.text)).values())
+    if not created:
+        post.post_tags.exclude(tag_id__in=tag_ids).delete()
+        post.mentions.exclude(user_id__in=mentioned).delete()
+        tag_ids -= set(post.post_tags.values_list('tag_id', flat=True))
+        mentioned -= set(post.mentions.values_list('user_id', flat=True))
+    if tag_ids:
+        PostTag.objects.bulk_create(
+            [PostTag(post=post, tag_id=tag_id, pub_date=post.pub_date)
+             for tag_id in tag_ids], ignore_conflicts=True)
+    if mentioned:
+        Mention.objects.bulk_create(
+            [Mention(post=post, user_id=user_id, pub_date=post.pub_date)
+             for user_id in mentioned], ignore_conflicts=True)
+
+
+def tag_paginator(tag, per_page):
+    # Порядок и курсор — по полям PostTag, чтобы выборка шла по индексу.
+    return CursorPaginator(tag.post_tags.all(), per_page,
+                           ordering=('pub_date', 'post_id'))
+
+
+def resolve_posts(page, queryset=None):
+    """Заменяет строки PostTag на странице самими постами."""
+    if queryset is None:
+        queryset = Post.objects.for_feed()
+    posts = queryset.in_bulk([entry.post_id for entry in page])
+    return page.resolve(posts[entry.post_id] for entry in page
+                        if entry.post_id in posts)
+
+
+def backfill_batch(posts):
+    """Разбирает пачку (pk, text, pub_date) за несколько запросов."""
+    parsed = [(pk, pub_date, extract_tags(text), extract_mentions(text))
+              for pk, text, pub_date in posts]
+    tags = get_tags(
+        name for _, _, names, _ in parsed for name in names)
+    users = user_ids(
+        {name for _, _, _, names in parsed for name in names})
+    PostTag.objects.bulk_create(
+        [PostTag(post_id=pk, tag=tags[name], pub_date=pub_date)
+         for pk, pub_date, names, _ in parsed for name in names],
+        ignore_conflicts=True)
+    Mention.objects.bulk_create(
+        [Mention(post_id=pk, user_id=users[name], pub_date=pub_date)
+         for pk, pub_date, _, names in parsed
+         for name in names if name in users],
+        ignore_conflicts=True)
+
+
+def backfill(batch_size=BATCH_SIZE, start=0):
+    """Проходит таблицу постов по возрастанию pk пачками, не держа её
+    в памяти целиком. Возвращает число обработанных постов."""
+    processed, last_pk = 0, start
+    while True:
+        batch = list(Post.objects.filter(pk__gt=last_pk).order_by(
+            'pk').values_list('pk', 'text', 'pub_date')[:batch_size])
+        if not batch:
+            return processed
+        with transaction.atomic():
+            backfill_batch(batch)
+        processed += len(batch)
+        last_pk = batch[-1][0]
@@ -0,0 +1,26 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+from posts.tags import MENTION_RE, TAG_RE
+
+register = template.Library()
+
+
+def _tag_link(match):
+    url = reverse('tag_posts', kwargs={'tag': match.group(1).lower()})
+    return format_html('<a href="{}">#{}</a>', url, match.group(1))
+
+
+def _mention_link(match):
+    url = reverse('profile', kwargs={'username': match.group(1)})
+    return format_html('<a href="{}">@{}</a>', url, match.group(1))
+
+
+@register.filter(needs_autoescape=True)
+def link_tags(text, autoescape=True):
+    """Превращает #теги и @упоминания в ссылки, остальное экранирует."""
+    text = conditional_escape(text) if autoescape else text
+    text = TAG_RE.sub(_tag_link, text)
+    return mark_safe(MENTION_RE.sub(_mention_link, text))
@@ -0,0 +1,155 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+SLUG = 'test'
+NAME = 'test'
+NAME2 = 'test2'
+
+INDEX_URL = reverse('index')
+GROUP_POSTS_URL = reverse('group_post', kwargs={'slug': SLUG})
+PROFILE_URL = reverse('profile', kwargs={'username': NAME})
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.user2 = User.objects.create_user(username=NAME2)
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug=SLUG,
+            description='Тестовое описание группы',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.user2)
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.user, group=self.group)
+        self.edit_url = reverse('post_edit', kwargs={
+            'username': NAME, 'post_id': self.post.id})
+
+    def test_pages_are_cached_separately(self):
+        """Вторая страница не отдаётся из кэша первой."""
+        for number in range(10):
+            Post.objects.create(text=f'Пост {number}', author=self.user2)
+        first = self.guest_client.get(INDEX_URL)
+        second = self.guest_client.get(INDEX_URL, {'page': 2})
+        self.assertNotEqual(first.content, second.content)
+        self.assertContains(second, 'Первый пост')
+        self.assertNotContains(first, 'Первый пост')
+
+    def test_edit_link_does_not_leak_to_other_users(self):
+        """Ссылка на редактирование не попадает в общий фрагмент."""
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                self.assertContains(self.author_client.get(url),
+                                    self.edit_url)
+                self.assertNotContains(self.reader_client.get(url),
+                                       self.edit_url)
+                self.assertNotContains(self.guest_client.get(url),
+                                       self.edit_url)
+
+    def test_new_post_invalidates_feeds(self):
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            self.guest_client.get(url)
+        Post.objects.create(text='Свежий пост', author=self.user,
+                            group=self.group)
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Свежий пост')
+
+    def test_edit_invalidates_post_fragment_and_old_group(self):
+        self.guest_client.get(GROUP_POSTS_URL)
+        self.guest_client.get(INDEX_URL)
+        self.author_client.post(self.edit_url, {'text': 'Исправленный'})
+        self.assertContains(self.guest_client.get(INDEX_URL), 'Исправленный')
+        self.assertNotContains(self.guest_client.get(GROUP_POSTS_URL),
+                               'Первый пост')
+
+    def test_delete_invalidates_feeds(self):
+        self.guest_client.get(INDEX_URL)
+        self.post.delete()
+        self.assertNotContains(self.guest_client.get(INDEX_URL),
+                               'Первый пост')
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug=SLUG,
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.user, group=cls.group)
+        cls.post_url = reverse('post', kwargs={
+            'username': NAME, 'post_id': cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL, self.post_url):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                self.assertEqual(first['X-Page-Cache'], 'miss')
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(second['X-Page-Cache'], 'hit')
+                self.assertEqual(second.content, first.content)
+                self.assertIn('public', second['Cache-Control'])
+                self.assertIn('max-age=30', second['Cache-Control'])
+                self.assertIn('Cookie', second['Vary'])
+
+    def test_query_string_is_part_of_key(self):
+        self.guest_client.get(INDEX_URL)
+        self.assertEqual(
+            self.guest_client.get(INDEX_URL, {'page': 2})['X-Page-Cache'],
+            'miss')
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.guest_client.get(INDEX_URL)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(INDEX_URL)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_changes_invalidate_only_affected_pages(self):
+        other = Post.objects.create(text='Другой пост', author=User.objects.
+                                    create_user(username=NAME2))
+        other_url = reverse('post', kwargs={'username': NAME2,
+                                            'post_id': other.id})
+        for url in (GROUP_POSTS_URL, PROFILE_URL, self.post_url, other_url):
+            self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный'
+        post.save()
+        for url in (GROUP_POSTS_URL, PROFILE_URL, self.post_url):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'miss')
+                self.assertContains(response, 'Исправленный')
+        self.assertEqual(self.guest_client.get(other_url)['X-Page-Cache'],
+                         'hit')
+
+    def test_new_comment_invalidates_post_page(self):
+        self.guest_client.get(self.post_url)
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('add_comment', args=[NAME, self.post.id]),
+                    {'text': 'Новый комментарий'})
+        self.assertContains(self.guest_client.get(self.post_url),
+                            'Новый комментарий')
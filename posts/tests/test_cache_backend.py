@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from yatube.cache import InstrumentedCache, key_prefix
+from yatube.checks import LOCMEM, check_shared_cache
+
+FILE_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class InstrumentedCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+    def make_cache(self, version=1):
+        # Отдельный экземпляр на общем каталоге — как воркер gunicorn.
+        return InstrumentedCache(self.location, {
+            'TARGET_BACKEND': FILE_BACKEND,
+            'KEY_PREFIX': 'yatube',
+            'VERSION': version,
+        })
+
+    def test_key_prefix(self):
+        self.assertEqual(key_prefix('generation:index'), 'generation')
+        self.assertEqual(key_prefix('template.cache.post_item.abc'),
+                         'template.cache.post_item')
+        self.assertEqual(key_prefix('sorl-thumbnail||image||x'),
+                         'sorl-thumbnail')
+
+    def test_workers_share_values_and_stats(self):
+        first, second = self.make_cache(), self.make_cache()
+        first.set('generation:index', 1)
+        self.assertEqual(second.get('generation:index'), 1)
+        second.get('generation:group')
+        first.get('generation:index')
+        first.flush_stats()
+        second.flush_stats()
+        self.assertEqual(self.make_cache().stats(), {
+            'generation': {'hits': 2, 'misses': 1},
+        })
+
+    def test_version_change_invalidates_keys(self):
+        self.make_cache(version=1).set('generation:index', 1)
+        self.assertIsNone(self.make_cache(version=2).get('generation:index'))
+
+    def test_cache_stats_command(self):
+        cache = self.make_cache()
+        cache.get('generation:index')
+        out = StringIO()
+        with mock.patch('posts.management.commands.cache_stats.cache',
+                        cache):
+            call_command('cache_stats', stdout=out)
+        self.assertIn('generation', out.getvalue())
+        self.assertIn('0.0%', out.getvalue())
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    def cache_settings(self, backend):
+        return {'default': {'BACKEND': 'yatube.cache.InstrumentedCache',
+                            'TARGET_BACKEND': backend}}
+
+    def test_locmem_warns(self):
+        with override_settings(CACHES=self.cache_settings(LOCMEM)):
+            self.assertEqual([warning.id for warning
+                              in check_shared_cache(None)], ['yatube.W001'])
+        with override_settings(CACHES=self.cache_settings(FILE_BACKEND)):
+            self.assertEqual(check_shared_cache(None), [])
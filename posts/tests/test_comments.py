@@ -0,0 +1,115 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Post, User
+from posts.paginator import COMMENT_ORDERING, NEXT, CursorPaginator
+from posts.views import COMMENTS_PER_PAGE
+
+NAME = 'test'
+TOTAL = COMMENTS_PER_PAGE * 2 + 5
+COMMENT_ID = re.compile(r'name="comment_(\d+)"')
+
+
+class CommentPagesTests(TestCase):
+    """Комментарии поста листаются по курсору (created, id)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        for number in range(TOTAL):
+            commenter = User.objects.create_user(username=f'reader{number}')
+            Comment.objects.create(post=cls.post, author=commenter,
+                                   text=f'Комментарий {number}')
+        cls.post_url = reverse('post', args=[NAME, cls.post.pk])
+        cls.more_url = reverse('post_comments', args=[NAME, cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def newest_first(self):
+        return list(Comment.objects.filter(post=self.post).order_by(
+            '-created', '-id'))
+
+    def count_queries(self, client, url):
+        queries = []
+        with connection.execute_wrapper(
+                lambda execute, sql, *args: queries.append(sql) or
+                execute(sql, *args)):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_post_page_shows_first_page(self):
+        first_page = self.newest_first()[:COMMENTS_PER_PAGE]
+        # Пост, страница комментариев вместе с признаком следующей
+        # и счётчики автора.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.post_url)
+        self.assertEqual(list(response.context['comments']), first_page)
+        self.assertEqual(
+            [int(pk) for pk in COMMENT_ID.findall(response.content.decode())],
+            [comment.pk for comment in first_page])
+        cursor = response.context['comments_page'].next_cursor
+        self.assertEqual(cursor, CursorPaginator(
+            Comment.objects.all(), COMMENTS_PER_PAGE,
+            COMMENT_ORDERING).encode_cursor(first_page[-1], NEXT))
+        self.assertContains(response, 'Показать ещё')
+        self.assertContains(response, f'data-cursor="{cursor}"')
+
+    def test_load_more_walks_all_comments(self):
+        seen, cursor = [], self.client.get(
+            self.post_url).context['comments_page'].next_cursor
+        while cursor:
+            data = self.client.get(self.more_url, {'cursor': cursor}).json()
+            seen += [int(pk) for pk in COMMENT_ID.findall(data['html'])]
+            cursor = data['next']
+        self.assertEqual(
+            seen, [comment.pk
+                   for comment in self.newest_first()[COMMENTS_PER_PAGE:]])
+        # Без JavaScript ссылка ведёт на ту же страницу поста.
+        response = self.client.get(self.post_url, {'comments': 'мусор'})
+        self.assertEqual(len(response.context['comments']),
+                         COMMENTS_PER_PAGE)
+
+    def test_load_more_errors(self):
+        self.assertEqual(
+            self.client.get(self.more_url, {'cursor': 'мусор'}).status_code,
+            404)
+        url = reverse('post_comments', args=['reader0', self.post.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_authors_are_joined(self):
+        client = Client()
+        client.force_login(self.user)
+        post = Post.objects.create(text='Новый пост', author=self.user)
+        urls = (reverse('post', args=[NAME, post.pk]),
+                reverse('post_comments', args=[NAME, post.pk]))
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.user, text='Свой')
+            for _ in range(COMMENTS_PER_PAGE + 1)])
+        same_author = [self.count_queries(client, url) for url in urls]
+        Comment.objects.bulk_create([
+            Comment(post=post, author=User.objects.get(
+                username=f'reader{number}'), text='Чужой')
+            for number in range(COMMENTS_PER_PAGE)])
+        self.assertEqual([self.count_queries(client, url) for url in urls],
+                         same_author)
+
+    def test_api_shares_cursor(self):
+        cursor = self.client.get(
+            self.post_url).context['comments_page'].next_cursor
+        html = self.client.get(self.more_url, {'cursor': cursor}).json()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(
+            f'/api/v1/posts/{self.post.pk}/comments/', {'cursor': cursor})
+        self.assertEqual(
+            [comment['id'] for comment in response.json()['results']],
+            [int(pk) for pk in COMMENT_ID.findall(html['html'])])
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Follow, Like, Post, User, UserStats
+
+NAME = 'test'
+NAME2 = 'test2'
+
+PROFILE_URL = reverse('profile', kwargs={'username': NAME2})
+PROFILE_FOLLOW_URL = reverse('profile_follow', kwargs={'username': NAME2})
+PROFILE_UNFOLLOW_URL = reverse('profile_unfollow',
+                               kwargs={'username': NAME2})
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.author = User.objects.create_user(username=NAME2)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(text='Test', author=self.author)
+        self.kwargs = {'username': NAME2, 'post_id': self.post.id}
+
+    def assertPostCounters(self, likes, comments):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, likes)
+        self.assertEqual(self.post.comments_count, comments)
+
+    def test_like_and_unlike_update_post_counter(self):
+        self.authorized_client.get(reverse('post_like', kwargs=self.kwargs))
+        self.authorized_client.get(reverse('post_like', kwargs=self.kwargs))
+        self.assertPostCounters(likes=1, comments=0)
+        self.authorized_client.get(
+            reverse('post_delete_like', kwargs=self.kwargs))
+        self.assertPostCounters(likes=0, comments=0)
+
+    def test_add_comment_updates_post_counter(self):
+        self.authorized_client.post(
+            reverse('add_comment', kwargs=self.kwargs), {'text': 'Test'})
+        self.assertPostCounters(likes=0, comments=1)
+
+    def test_follow_and_unfollow_update_user_stats(self):
+        self.authorized_client.get(PROFILE_FOLLOW_URL)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count, 1)
+        self.authorized_client.get(PROFILE_UNFOLLOW_URL)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 0)
+
+    def test_profile_renders_stats(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(PROFILE_URL)
+        self.assertEqual(response.context['stats'].posts_count, 1)
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Записей: 1')
+
+    def test_api_updates_counters(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post(f'/api/v1/posts/{self.post.id}/comments/',
+                    {'text': 'Test'})
+        client.post('/api/v1/posts/', {'text': 'Test'})
+        self.assertPostCounters(likes=0, comments=1)
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count,
+                         1)
+
+    def test_missing_stats_row_is_computed_on_read(self):
+        UserStats.objects.filter(user=self.author).delete()
+        response = self.authorized_client.get(PROFILE_URL)
+        self.assertEqual(response.context['stats'].posts_count, 1)
+
+    def test_recount_command_repairs_drift(self):
+        Like.objects.create(post=self.post, author=self.user)
+        Comment.objects.create(post=self.post, author=self.user, text='T')
+        Post.objects.filter(pk=self.post.pk).update(
+            likes_count=10, comments_count=0)
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertPostCounters(likes=1, comments=1)
+        self.assertEqual(UserStats.objects.get(user=self.author).posts_count,
+                         1)
@@ -0,0 +1,113 @@
+import threading
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import (
+    Client,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Like, Post, User
+from yatube import db
+
+THREADS = 8
+POSTS = 5
+
+
+class ConnectionHealthCheckTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        connection.ensure_connection()
+        patcher = mock.patch.dict(connection.settings_dict,
+                                  {'CONN_MAX_AGE': 60})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_broken_connection_is_closed(self):
+        """Оборванное сервером соединение закрывается до запроса."""
+        with mock.patch.object(connection, 'is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            db.check_connections()
+        close.assert_called_once_with()
+
+    def test_usable_connection_is_kept(self):
+        with mock.patch.object(connection, 'close') as close:
+            db.check_connections()
+        close.assert_not_called()
+
+    @override_settings(DB_HEALTH_CHECKS=False)
+    def test_checks_can_be_disabled(self):
+        with mock.patch.object(connection, 'is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            db.check_connections()
+        close.assert_not_called()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Прагмы есть только у SQLite')
+class SqlitePragmaTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        # 1 — NORMAL.
+        self.assertEqual(self.pragma('synchronous'), 1)
+        for name, value in db.sqlite_pragmas().items():
+            if name not in ('journal_mode', 'synchronous'):
+                with self.subTest(pragma=name):
+                    self.assertEqual(self.pragma(name), value)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 100,
+                                       'mmap_size': None})
+    def test_pragmas_configurable(self):
+        pragmas = db.sqlite_pragmas()
+        self.assertEqual(pragmas['busy_timeout'], 100)
+        self.assertNotIn('mmap_size', pragmas)
+
+
+class ConcurrentLikeTests(TransactionTestCase):
+    """Параллельные лайки не упираются в блокировки базы."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.posts = [Post.objects.create(text=f'Пост {number}',
+                                          author=self.author)
+                      for number in range(POSTS)]
+        self.readers = [User.objects.create_user(username=f'reader{number}')
+                        for number in range(THREADS)]
+
+    def like_all(self, user, errors):
+        client = Client()
+        client.force_login(user)
+        try:
+            for _ in range(2):
+                for post in self.posts:
+                    response = client.get(reverse('post_like', kwargs={
+                        'username': 'author', 'post_id': post.id}))
+                    if response.status_code != 302:
+                        errors.append(response.status_code)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_parallel_likes(self):
+        errors = []
+        threads = [threading.Thread(target=self.like_all,
+                                    args=(reader, errors))
+                   for reader in self.readers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Like.objects.count(), THREADS * POSTS)
+        for post in Post.objects.all():
+            self.assertEqual(post.likes_count, THREADS)
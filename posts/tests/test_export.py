@@ -0,0 +1,103 @@
+import csv
+import datetime
+import io
+import json
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Like, Post, User
+
+NAME = 'test'
+TOKEN = 'secret'
+
+
+def export_url(table):
+    return reverse('export', args=[table])
+
+
+@override_settings(EXPORT_TOKEN=TOKEN, EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.posts = [Post.objects.create(text=f'Пост {number}',
+                                         author=cls.user)
+                     for number in range(5)]
+        # Первые два поста — прошлогодние.
+        old = [post.pk for post in cls.posts[:2]]
+        Post.objects.filter(pk__in=old).update(
+            pub_date=timezone.now() - datetime.timedelta(days=365))
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Первый, "с кавычками"')
+        Like.objects.create(post=cls.posts[0], author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+
+    def stream(self, table, **params):
+        response = self.client.get(export_url(table), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_access(self):
+        self.assertEqual(Client().get(export_url('posts')).status_code, 403)
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(client.get(export_url('posts')).status_code, 403)
+        client.force_login(self.staff)
+        self.assertEqual(client.get(export_url('posts')).status_code, 200)
+
+    def test_ndjson_posts_since_and_after_id(self):
+        records = [json.loads(line)
+                   for line in self.stream('posts').splitlines()]
+        self.assertEqual([record['id'] for record in records],
+                         [post.pk for post in self.posts])
+        self.assertEqual(records[0]['author'], NAME)
+        self.assertEqual(records[0]['likes_count'], 1)
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        lines = self.stream('posts', since=since).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines],
+                         [post.pk for post in self.posts[2:]])
+        lines = self.stream('posts', after_id=self.posts[3].pk).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines],
+                         [self.posts[4].pk])
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(
+            self.stream('comments', format='csv'))))
+        self.assertEqual(rows[0], ['id', 'post', 'author', 'text', 'created'])
+        self.assertEqual(rows[1][1:4], [str(self.posts[0].pk), 'reader',
+                                        'Первый, "с кавычками"'])
+        rows = list(csv.reader(io.StringIO(
+            self.stream('follows', format='csv'))))
+        self.assertEqual(rows[1][1:], ['reader', NAME])
+
+    def test_bad_requests(self):
+        self.assertEqual(
+            self.client.get(export_url('users')).status_code, 404)
+        for table, params in (('posts', {'format': 'xml'}),
+                              ('posts', {'since': 'вчера'}),
+                              ('posts', {'after_id': 'x'}),
+                              ('likes', {'since': '2021-01-01'})):
+            with self.subTest(table=table, params=params):
+                response = self.client.get(export_url(table), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_data', 'likes', stdout=out)
+        self.assertEqual(json.loads(out.getvalue()),
+                         {'id': Like.objects.get().pk,
+                          'post': self.posts[0].pk, 'author': 'reader'})
+        out = io.StringIO()
+        call_command('export_data', 'posts', '--format', 'csv',
+                     '--since', timezone.localdate().isoformat(),
+                     stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
@@ -0,0 +1,97 @@
+import re
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.test import TestCase
+
+from posts.models import Follow, Group, Like, Post, User
+from posts.paginator import NEXT, CursorPaginator
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть у SQLite')
+class HotQueryIndexTests(TestCase):
+    """Горячие запросы лент, подписок и лайков идут по индексам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test')
+        cls.author = User.objects.create_user(username='test2')
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug='test',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Test', author=cls.author, group=cls.group)
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, index=None):
+        plan = self.plan(queryset)
+        for step in plan:
+            self.assertIsNone(re.fullmatch(r'SCAN \w+', step),
+                              f'Полный просмотр таблицы: {plan}')
+        self.assertTrue(any('INDEX' in step for step in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+        if index:
+            self.assertTrue(any(index in step for step in plan), plan)
+
+    def test_author_feed_uses_composite_index(self):
+        self.assertUsesIndex(
+            Post.objects.filter(author=self.author)[:10],
+            'post_author_pub_date_idx')
+
+    def test_group_feed_uses_composite_index(self):
+        self.assertUsesIndex(
+            Post.objects.filter(group=self.group)[:10],
+            'post_group_pub_date_idx')
+
+    def test_cursor_feeds_are_covered_by_index(self):
+        """Порядок (-pub_date, -id) курсорной ленты целиком берётся
+        из индекса, без досортировки."""
+        page = CursorPaginator(Post.objects.all(), 10)
+        cursor = page.encode_cursor(self.post, NEXT)
+        for queryset, index in (
+                (Post.objects.filter(author=self.author),
+                 'post_author_pub_date_idx'),
+                (Post.objects.filter(group=self.group),
+                 'post_group_pub_date_idx')):
+            paginator = CursorPaginator(queryset, 10)
+            _, values = paginator.decode_cursor(cursor)
+            for keyset in (Q(), paginator._keyset(values, 'lt')):
+                with self.subTest(index=index, keyset=bool(keyset)):
+                    self.assertUsesIndex(
+                        queryset.filter(keyset).order_by(
+                            '-pub_date', '-id')[:11], index)
+
+    def test_follow_lookup_uses_index(self):
+        self.assertUsesIndex(Follow.objects.filter(
+            user=self.user, author=self.author).values('pk')[:1])
+
+    def test_like_lookup_uses_index(self):
+        self.assertUsesIndex(Like.objects.filter(
+            post=self.post, author=self.user).values('pk')[:1])
+
+
+class UniquePairsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test')
+        cls.author = User.objects.create_user(username='test2')
+        cls.post = Post.objects.create(text='Test', author=cls.author)
+
+    def test_duplicate_follow_is_rejected(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.author)
+
+    def test_duplicate_like_is_rejected(self):
+        Like.objects.create(post=self.post, author=self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Like.objects.create(post=self.post, author=self.user)
@@ -0,0 +1,179 @@
+import os
+import random
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts import likes
+from posts.models import Like, Post, User
+
+NAME = 'test'
+THREADS = 6
+
+
+def like_url(post):
+    return f'/api/v1/posts/{post.pk}/like/'
+
+
+class LikeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def likes_count(self):
+        return Post.objects.get(pk=self.post.pk).likes_count
+
+    def test_like_and_unlike_are_idempotent(self):
+        self.assertIs(likes.like(self.post.pk, self.reader.pk), True)
+        self.assertIs(likes.like(self.post.pk, self.reader.pk), False)
+        self.assertEqual(self.likes_count(), 1)
+        self.assertIs(likes.unlike(self.post.pk, self.reader.pk), True)
+        self.assertIs(likes.unlike(self.post.pk, self.reader.pk), False)
+        self.assertEqual(self.likes_count(), 0)
+
+    def test_like_checks_post_and_author(self):
+        self.assertIs(likes.like(self.post.pk, self.reader.pk, 'reader'),
+                      False)
+        self.assertIs(likes.like(self.post.pk + 100, self.reader.pk), False)
+        self.assertFalse(Like.objects.exists())
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('post_like',
+                                      args=['reader', self.post.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = client.get(reverse('post_delete_like',
+                                      args=[NAME, self.post.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_api_like(self):
+        client = APIClient()
+        self.assertEqual(client.post(like_url(self.post)).status_code, 401)
+        client.force_authenticate(self.reader)
+        response = client.post(like_url(self.post))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'liked': True, 'likes_count': 1})
+        self.assertEqual(client.post(like_url(self.post)).status_code, 200)
+        response = client.delete(like_url(self.post))
+        self.assertEqual(response.json(), {'liked': False, 'likes_count': 0})
+        self.assertEqual(client.delete(like_url(self.post)).status_code, 200)
+        self.assertEqual(
+            client.post('/api/v1/posts/100500/like/').status_code, 404)
+
+    @override_settings(LIKE_BUFFER_SIZE=100, LIKE_BUFFER_INTERVAL=60)
+    def test_buffer_coalesces_bursts(self):
+        self.addCleanup(likes.buffer.flush)
+        for _ in range(3):
+            likes.like(self.post.pk, self.reader.pk)
+            likes.unlike(self.post.pk, self.reader.pk)
+        likes.like(self.post.pk, self.reader.pk)
+        likes.like(self.post.pk, self.user.pk)
+        likes.unlike(self.post.pk, self.user.pk)
+        self.assertFalse(Like.objects.exists())
+        # Свой отложенный лайк пользователь видит.
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('post', args=[NAME, self.post.pk]))
+        self.assertTrue(response.context['like'])
+        self.assertEqual(likes.buffer.flush(), 2)
+        self.assertEqual(
+            list(Like.objects.values_list('author', flat=True)),
+            [self.reader.pk])
+        self.assertEqual(self.likes_count(), 1)
+
+
+class ConcurrentToggleTests(TransactionTestCase):
+    """Параллельные лайки и отмены оставляют точные счётчики."""
+
+    def setUp(self):
+        author = User.objects.create_user(username=NAME)
+        self.post = Post.objects.create(text='Пост', author=author)
+        self.readers = [User.objects.create_user(username=f'reader{number}')
+                        for number in range(THREADS)]
+
+    def run_threads(self, target):
+        errors = []
+
+        def run(*args):
+            try:
+                target(*args)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(reader, number))
+                   for number, reader in enumerate(self.readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertCountsExact(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count,
+                         Like.objects.filter(post=self.post).count())
+
+    def toggle(self, reader, number):
+        rng = random.Random(number)
+        for _ in range(20):
+            if rng.random() < 0.5:
+                likes.like(self.post.pk, reader.pk)
+            else:
+                likes.unlike(self.post.pk, reader.pk)
+        # Последнее действие каждого читателя — лайк у чётных.
+        if number % 2:
+            likes.unlike(self.post.pk, reader.pk)
+        else:
+            likes.like(self.post.pk, reader.pk)
+
+    def test_parallel_toggles(self):
+        self.run_threads(self.toggle)
+        self.assertCountsExact()
+        self.assertEqual(self.post.likes_count, THREADS // 2)
+
+    def test_same_user_parallel_likes(self):
+        reader = self.readers[0]
+        self.run_threads(
+            lambda _, number: likes.like(self.post.pk, reader.pk))
+        self.assertCountsExact()
+        self.assertEqual(self.post.likes_count, 1)
+
+    @override_settings(LIKE_BUFFER_SIZE=3, LIKE_BUFFER_INTERVAL=60)
+    def test_parallel_toggles_through_buffer(self):
+        self.run_threads(self.toggle)
+        likes.buffer.flush()
+        self.assertCountsExact()
+        self.assertEqual(self.post.likes_count, THREADS // 2)
+
+
+class LikeBufferExitTests(TransactionTestCase):
+    def test_buffer_flushed_at_exit(self):
+        """Лайки из буфера записываются, когда процесс завершается."""
+        author = User.objects.create_user(username=NAME)
+        post = Post.objects.create(text='Пост', author=author)
+        code = ('import django; django.setup(); '
+                'from posts import likes; '
+                f'assert likes.like({post.pk}, {author.pk}) is None')
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='yatube.settings',
+                   DB_NAME=connection.settings_dict['NAME'],
+                   LIKE_BUFFER_SIZE='100', LIKE_BUFFER_INTERVAL='60')
+        subprocess.run([sys.executable, '-c', code], env=env,
+                       cwd=settings.BASE_DIR, check=True)
+        post.refresh_from_db()
+        self.assertTrue(Like.objects.filter(post=post,
+                                            author=author).exists())
+        self.assertEqual(post.likes_count, 1)
@@ -0,0 +1,95 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import metrics
+
+NAME = 'test'
+METRICS_URL = reverse('metrics')
+SLOW_URL = reverse('metrics_slow')
+TOKEN = 'secret'
+
+
+@override_settings(METRICS_TOKEN=TOKEN)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def scrape(self):
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_access(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        self.assertEqual(
+            self.client.get(METRICS_URL,
+                            HTTP_AUTHORIZATION='Bearer wrong').status_code,
+            403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(SLOW_URL).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
+
+    def test_request_is_measured_per_view(self):
+        # Вошедшим страница не отдаётся из кэша целиком.
+        self.client.force_login(self.user)
+        for _ in range(3):
+            self.client.get(reverse('index'))
+        self.client.get('/no/such/page/')
+        data = metrics.registry.snapshot()
+        self.assertEqual(data['index']['count'], 3)
+        quantiles = data['index']['quantiles']
+        self.assertGreater(quantiles['queries'][0.5], 0)
+        self.assertGreater(quantiles['template_time'][0.99], 0)
+        self.assertGreater(data['index']['sum']['latency'],
+                           data['index']['sum']['db_time'])
+        # Поколения кэша и фрагменты ленты.
+        self.assertGreater(data['index']['sum']['cache_hits'] +
+                           data['index']['sum']['cache_misses'], 0)
+        text = self.scrape()
+        self.assertIn('# TYPE yatube_request_duration_seconds summary', text)
+        self.assertIn('yatube_db_queries_count{view="index"} 3', text)
+        self.assertIn('yatube_request_duration_seconds{view="index",'
+                      'quantile="0.99"}', text)
+        self.assertIn('yatube_requests_total{view="index",status="200"} 3',
+                      text)
+        self.assertIn('view="<unresolved>",status="404"', text)
+        # Сами метрики не замеряются.
+        self.assertNotIn('view="metrics"', self.scrape())
+
+    @override_settings(METRICS_BUFFER_SIZE=2)
+    def test_ring_buffer_keeps_last_requests(self):
+        for _ in range(5):
+            self.client.get(reverse('index'))
+        data = metrics.registry.snapshot()['index']
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(len(metrics.registry._windows['index']), 2)
+
+    @override_settings(METRICS_SLOW_MS=0)
+    def test_slow_requests_keep_sql_without_params(self):
+        with self.assertLogs('yatube.metrics', 'WARNING'):
+            self.client.get(reverse('profile', args=[NAME]))
+        self.client.force_login(self.staff)
+        slow = self.client.get(SLOW_URL).json()['results']
+        self.assertEqual(slow[0]['view'], 'profile')
+        self.assertEqual(len(slow[0]['sql']), slow[0]['queries'])
+        self.assertTrue(any('auth_user' in query['sql']
+                            for query in slow[0]['sql']))
+        self.assertFalse(any(f"'{NAME}'" in query['sql']
+                             for query in slow[0]['sql']))
+
+    def test_quantile(self):
+        values = list(range(1, 101))
+        self.assertEqual(metrics.quantile(values, 0.5), 50)
+        self.assertEqual(metrics.quantile(values, 0.99), 99)
+        self.assertEqual(metrics.quantile([7], 0.9), 7)
@@ -0,0 +1,121 @@
+import datetime as dt
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+from posts.paginator import CursorPage, CursorPaginator
+
+SLUG = 'test'
+NAME = 'test'
+
+INDEX_URL = reverse('index')
+GROUP_POSTS_URL = reverse('group_post', kwargs={'slug': SLUG})
+PROFILE_URL = reverse('profile', kwargs={'username': NAME})
+FOLLOW_INDEX_URL = reverse('follow_index')
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug=SLUG,
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Test {number}', author=cls.user, group=cls.group)
+            for number in range(25)
+        )
+        # Часть постов с одинаковой датой: порядок решает id.
+        same_date = timezone.now() - dt.timedelta(days=1)
+        Post.objects.filter(
+            id__in=Post.objects.order_by('id').values('id')[:5]
+        ).update(pub_date=same_date)
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_pages_cover_all_posts_in_order(self):
+        """Переход по курсору «старее» проходит все посты по порядку."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.page()
+        seen = list(page)
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.expected)
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор «новее» возвращает ту же страницу, что была до перехода."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page('not-a-cursor')
+        self.assertEqual(list(page), self.expected[:10])
+
+    def test_page_does_not_count(self):
+        """Страница по курсору — один запрос без COUNT и OFFSET."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.page(cursor)
+            list(page)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+
+@override_settings(FEED_PAGINATION='cursor')
+class CursorPaginationViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug=SLUG,
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Test {number}', author=cls.user, group=cls.group)
+            for number in range(15)
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feeds_use_cursor_pages(self):
+        """Ленты в режиме cursor отдают CursorPage и ссылки «старее»."""
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                page = response.context['page']
+                self.assertIsInstance(page, CursorPage)
+                self.assertEqual(len(page), 10)
+                self.assertContains(response, f'?cursor={page.next_cursor}')
+                response = self.authorized_client.get(
+                    url, {'cursor': page.next_cursor})
+                self.assertEqual(len(response.context['page']), 5)
+
+    def test_follow_index_uses_cursor_pages(self):
+        response = self.authorized_client.get(FOLLOW_INDEX_URL)
+        self.assertIsInstance(response.context['page'], CursorPage)
+
+    @override_settings(FEED_PAGINATION='page')
+    def test_page_mode_is_default_paginator(self):
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertIs(type(response.context['paginator']), Paginator)
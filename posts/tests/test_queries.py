@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Like, Post, User
+
+SLUG = 'test'
+NAME = 'test'
+NAME2 = 'test2'
+
+INDEX_URL = reverse('index')
+GROUP_POSTS_URL = reverse('group_post', kwargs={'slug': SLUG})
+PROFILE_URL = reverse('profile', kwargs={'username': NAME2})
+FOLLOW_INDEX_URL = reverse('follow_index')
+
+
+class FeedQueryCountTests(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.author = User.objects.create_user(username=NAME2)
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug=SLUG,
+            description='Тестовое описание группы',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def add_posts(self, count):
+        for number in range(count):
+            post = Post.objects.create(
+                text=f'Test {number}',
+                author=self.author,
+                group=self.group,
+            )
+            Comment.objects.create(post=post, author=self.user, text='Test')
+            Like.objects.create(post=post, author=self.user)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_feed_query_count_is_constant(self):
+        urls = (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL, FOLLOW_INDEX_URL)
+        self.add_posts(1)
+        one_post = {url: self.count_queries(url) for url in urls}
+        self.add_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), one_post[url])
+
+    def test_feed_renders_annotated_counts(self):
+        self.add_posts(1)
+        response = self.authorized_client.get(GROUP_POSTS_URL)
+        post = response.context['page'][0]
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.likes_count, 1)
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_post_view_query_count_is_constant(self):
+        self.add_posts(1)
+        post = Post.objects.get()
+        url = reverse('post', kwargs={'username': NAME2, 'post_id': post.id})
+        one_comment = self.count_queries(url)
+        for number in range(5):
+            commenter = User.objects.create_user(username=f'reader{number}')
+            Comment.objects.create(post=post, author=commenter, text='Test')
+        self.assertEqual(self.count_queries(url), one_comment)
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.counters import get_user_stats
+from posts.models import Comment, Like, Post, UserStats
+from yatube import router
+
+NAME = 'test'
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        # Вторая база в памяти играет реплику, до которой изменения не
+        # доходят: что видно на страницах, показывает, из какой базы
+        # они прочитаны. Она существует только на время этих тестов.
+        connections.databases[REPLICA] = {
+            'ENGINE': 'yatube.sqlite3',
+            'NAME': ':memory:',
+        }
+        connections[REPLICA].creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            super().setUpClass()
+        except Exception:
+            cls.drop_replica()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls.drop_replica()
+
+    @classmethod
+    def drop_replica(cls):
+        connections[REPLICA].creation.destroy_test_db(':memory:',
+                                                      verbosity=0)
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.post = Post.objects.create(text='Старый пост', author=cls.user)
+        # Снимок основной базы на реплике; bulk_create — без сигналов.
+        User.objects.using(REPLICA).bulk_create([cls.user])
+        Post.objects.using(REPLICA).bulk_create([cls.post])
+        UserStats.objects.using(REPLICA).bulk_create(
+            [get_user_stats(cls.user)])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post_url = reverse('post', args=[NAME, self.post.pk])
+
+    def test_settings_routers(self):
+        self.assertEqual(settings.DATABASE_ROUTERS,
+                         ['yatube.router.ReplicaRouter'])
+
+    def test_safe_requests_read_replica(self):
+        Post.objects.create(text='Только на основной', author=self.user)
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Только на основной')
+        self.assertNotIn(router.PIN_COOKIE, response.cookies)
+
+    def test_no_replicas_read_primary(self):
+        Post.objects.create(text='Только на основной', author=self.user)
+        with override_settings(DATABASE_REPLICAS=[]):
+            response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Только на основной')
+
+    def test_writes_pin_reads_to_primary(self):
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(
+            reverse('add_comment', args=[NAME, self.post.pk]),
+            {'text': 'Свежий комментарий'})
+        self.assertEqual(response.cookies[router.PIN_COOKIE]['max-age'],
+                         router.pin_seconds())
+        # Тот, кто писал, сразу видит изменения, остальные читают
+        # с отставшей реплики.
+        self.assertContains(client.get(self.post_url), 'Свежий комментарий')
+        self.assertNotContains(self.client.get(self.post_url),
+                               'Свежий комментарий')
+        self.assertFalse(
+            Comment.objects.using(REPLICA).filter(post=self.post).exists())
+
+        response = client.get(reverse('post_like', args=[NAME, self.post.pk]))
+        self.assertIn(router.PIN_COOKIE, response.cookies)
+        self.assertTrue(client.get(self.post_url).context['like'])
+        self.assertFalse(self.client.get(self.post_url).context['like'])
+        self.assertTrue(Like.objects.filter(post=self.post).exists())
+
+    def test_new_post_is_visible_to_author(self):
+        response = self.client.post(reverse('new_post'),
+                                    {'text': 'Новый пост'})
+        self.assertIn(router.PIN_COOKIE, response.cookies)
+        self.assertContains(self.client.get(reverse('index')), 'Новый пост')
+        self.assertNotContains(Client().get(reverse('index')), 'Новый пост')
+
+    def test_router_after_write_reads_primary(self):
+        routing = router.ReplicaRouter()
+        # Вне запроса реплика не выбрана.
+        self.assertEqual(routing.db_for_read(Post), router.PRIMARY)
+        router._local.replica = REPLICA
+        self.addCleanup(setattr, router._local, 'replica', None)
+        router._local.wrote = False
+        self.assertEqual(routing.db_for_read(Post), REPLICA)
+        self.assertEqual(routing.db_for_write(Post), router.PRIMARY)
+        self.assertEqual(routing.db_for_read(Post), router.PRIMARY)
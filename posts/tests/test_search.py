@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts import search
+from posts.models import Comment, Group, Post, User
+
+NAME = 'test'
+SLUG = 'test'
+SEARCH_URL = reverse('search')
+API_POSTS_URL = '/api/v1/posts/'
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.group = Group.objects.create(
+            title='Название_тест',
+            slug=SLUG,
+            description='Тестовое описание группы',
+        )
+        cls.commented = Post.objects.create(
+            text='Просто пост', author=cls.user)
+        Comment.objects.create(post=cls.commented, author=cls.user,
+                               text='Вспомнил про Кракатау')
+        cls.post = Post.objects.create(
+            text='Извержение вулкана Кракатау', author=cls.user,
+            group=cls.group)
+        Post.objects.create(text='Совсем про другое', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query, **params):
+        response = self.client.get(SEARCH_URL, {'q': query, **params})
+        return [post.pk for post in response.context['page']]
+
+    def test_post_text_ranks_above_comment(self):
+        self.assertEqual(self.found('кракатау'),
+                         [self.post.pk, self.commented.pk])
+
+    def test_prefix_and_all_words(self):
+        self.assertEqual(self.found('ВУЛК крака'), [self.post.pk])
+        self.assertEqual(self.found('вулкан другое'), [])
+
+    def test_query_syntax_is_not_passed_to_index(self):
+        for query in ('"кракатау', 'кракатау OR (', '*', 'NEAR(a b)'):
+            with self.subTest(query=query):
+                response = self.client.get(SEARCH_URL, {'q': query})
+                self.assertEqual(response.status_code, 200)
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Спящий вулкан'
+        post.save()
+        self.assertEqual(self.found('кракатау'), [self.commented.pk])
+        self.assertEqual(self.found('спящий'), [post.pk])
+        self.commented.comments.all().delete()
+        self.assertEqual(self.found('кракатау'), [])
+        post.delete()
+        self.assertEqual(self.found('спящий'), [])
+
+    def test_pages_keep_query(self):
+        Post.objects.bulk_create(
+            Post(text=f'Кракатау {number}', author=self.user)
+            for number in range(15))
+        search.rebuild(batch_size=4)
+        response = self.client.get(SEARCH_URL, {'q': 'кракатау'})
+        self.assertEqual(response.context['paginator'].count, 17)
+        self.assertContains(response, '?q=%D0%BA%D1%80%D0%B0%D0%BA%D0%B0'
+                                      '%D1%82%D0%B0%D1%83&amp;page=2')
+        self.assertEqual(len(self.found('кракатау', page=2)), 7)
+
+    def test_rebuild_command(self):
+        search.clear()
+        self.assertEqual(self.found('кракатау'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', batch_size=2, stdout=out)
+        self.assertIn('постов: 3, комментариев: 1', out.getvalue())
+        self.assertEqual(self.found('кракатау'),
+                         [self.post.pk, self.commented.pk])
+
+    def test_api_search_is_ranked_and_filtered(self):
+        client = APIClient()
+        response = client.get(API_POSTS_URL, {'search': 'кракатау'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.post.pk, self.commented.pk])
+        response = client.get(API_POSTS_URL, {'search': 'кракатау',
+                                              'group': self.group.pk,
+                                              'fields': 'id,text'})
+        self.assertEqual(response.json()['results'],
+                         [{'id': self.post.pk, 'text': self.post.text}])
@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts import tags
+from posts.models import Mention, Post, PostTag, Tag, User
+
+NAME = 'test'
+NAME2 = 'test2'
+TAG_URL = reverse('tag_posts', kwargs={'tag': 'вулканы'})
+API_TAG_URL = '/api/v1/tags/вулканы/posts/'
+
+
+class TagExtractionTests(TestCase):
+
+    def test_extract(self):
+        text = ('#Вулканы и #вулканы, не тег: a#b &#39; '
+                'почта a@b.ru, привет @test. и @test2!')
+        self.assertEqual(tags.extract_tags(text), {'вулканы'})
+        self.assertEqual(tags.extract_mentions(text), {'test', 'test2'})
+
+    def test_link_tags_filter_escapes_text(self):
+        rendered = Template(
+            '{% load post_text %}{{ text|link_tags }}').render(
+            Context({'text': '<b>#Вулканы</b> @test'}))
+        self.assertEqual(
+            rendered,
+            f'&lt;b&gt;<a href="{TAG_URL}">#Вулканы</a>&lt;/b&gt; '
+            f'<a href="{reverse("profile", args=[NAME])}">@test</a>')
+
+
+class TagFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.user2 = User.objects.create_user(username=NAME2)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_save_syncs_tags_and_mentions(self):
+        post = Post.objects.create(
+            text='#Вулканы #горы @test2 @nobody', author=self.user)
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'вулканы', 'горы'})
+        self.assertEqual(list(post.mentions.values_list('user', flat=True)),
+                         [self.user2.pk])
+        post.text = '#горы #реки'
+        post.save()
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'горы', 'реки'})
+        self.assertFalse(post.mentions.exists())
+
+    def test_tag_feed_keyset_pages(self):
+        posts = [Post.objects.create(text=f'#вулканы {number}',
+                                     author=self.user)
+                 for number in range(12)]
+        Post.objects.create(text='#горы', author=self.user)
+        response = self.client.get(TAG_URL)
+        page = response.context['page']
+        self.assertEqual([post.pk for post in page],
+                         [post.pk for post in posts[::-1][:10]])
+        second = self.client.get(TAG_URL, {'cursor': page.next_cursor})
+        self.assertEqual([post.pk for post in second.context['page']],
+                         [posts[1].pk, posts[0].pk])
+
+    def test_tag_feed_queries_do_not_grow(self):
+        for number in range(10):
+            Post.objects.create(text=f'#вулканы {number}', author=self.user)
+        # Тег, страница PostTag, посты с авторами и группами.
+        with self.assertNumQueries(3):
+            tags.resolve_posts(
+                tags.tag_paginator(Tag.objects.get(name='вулканы'),
+                                   10).page())
+
+    def test_unknown_tag_is_404(self):
+        self.assertEqual(
+            self.client.get(reverse('tag_posts', args=['нет'])).status_code,
+            404)
+        response = APIClient().get('/api/v1/tags/нет/posts/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_api_tag_posts(self):
+        posts = [Post.objects.create(text=f'#Вулканы {number}',
+                                     author=self.user)
+                 for number in range(3)]
+        client = APIClient()
+        response = client.get(API_TAG_URL, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [posts[2].pk, posts[1].pk])
+        self.assertEqual(data['results'][0]['author'], NAME)
+        data = client.get(data['next']).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [posts[0].pk])
+        self.assertIsNone(data['next'])
+
+    def test_backfill_command(self):
+        Post.objects.bulk_create(
+            Post(text=f'#вулканы @{NAME2} {number}', author=self.user)
+            for number in range(5))
+        self.assertFalse(PostTag.objects.exists())
+        out = StringIO()
+        call_command('backfill_tags', batch_size=2, stdout=out)
+        self.assertIn('Обработано постов: 5', out.getvalue())
+        self.assertEqual(PostTag.objects.filter(tag__name='вулканы').count(),
+                         5)
+        self.assertEqual(Mention.objects.filter(user=self.user2).count(), 5)
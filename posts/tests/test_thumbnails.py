@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails, variants
+from posts.models import Post, User
+
+NAME = 'test'
+INDEX_URL = reverse('index')
+PLACEHOLDER = 'Картинка обрабатывается'
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def upload(name='small.gif'):
+    return SimpleUploadedFile(name=name, content=SMALL_GIF,
+                              content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=2)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_upload_does_not_build_thumbnail_in_request(self):
+        """Запрос не строит превью, лента показывает заглушку."""
+        with mock.patch.object(thumbnails, 'generate') as generate:
+            self.client.post(reverse('new_post'),
+                             {'text': 'Пост', 'image': upload()})
+            response = self.client.get(INDEX_URL)
+        generate.assert_not_called()
+        self.assertEqual(Post.objects.get().image_variants, '')
+        self.assertContains(response, PLACEHOLDER)
+
+    def test_ready_variants_replace_placeholder(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=upload())
+        self.client.get(INDEX_URL)
+        self.assertTrue(thumbnails.generate(post.pk))
+        post.refresh_from_db()
+        response = self.client.get(INDEX_URL)
+        self.assertNotContains(response, PLACEHOLDER)
+        for variant in post.image_variant_urls:
+            with self.subTest(width=variant['width']):
+                self.assertContains(response,
+                                    f'{variant["webp"]} {variant["width"]}w')
+                self.assertContains(response,
+                                    f'{variant["jpeg"]} {variant["width"]}w')
+
+    def test_variant_files(self):
+        """Для каждой ширины есть WebP и JPEG нужного размера."""
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=upload())
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        found = variants.decode(post.image_variants)
+        self.assertEqual([variant['width'] for variant in found],
+                         sorted(variants.widths()))
+        for variant in found:
+            for fmt in variants.FORMATS:
+                with self.subTest(width=variant['width'], fmt=fmt), \
+                        default_storage.open(variant[fmt]) as file, \
+                        Image.open(file) as image:
+                    self.assertEqual(image.format, fmt.upper())
+                    self.assertEqual(
+                        image.size, (variant['width'], variant['height']))
+
+    def test_api_returns_variant_urls(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=upload())
+        url = reverse('post-detail', kwargs={'pk': post.pk})
+        self.assertEqual(self.client.get(url).json()['image_variants'], [])
+        thumbnails.generate(post.pk)
+        found = self.client.get(url).json()['image_variants']
+        self.assertEqual(len(found), len(variants.widths()))
+        self.assertTrue(found[0]['webp'].startswith('http://testserver/'))
+        self.assertTrue(found[0]['webp'].endswith('.webp'))
+
+    def test_edit_keeps_or_resets_thumbnail(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=upload())
+        thumbnails.generate(post.pk)
+        edit_url = reverse('post_edit', kwargs={'username': NAME,
+                                                'post_id': post.pk})
+        # Форму открыли до того, как превью было готово.
+        stale = Post.objects.get(pk=post.pk)
+        stale.image_variants = ''
+        stale.text = 'Исправленный'
+        stale.save()
+        self.assertNotEqual(Post.objects.get(pk=post.pk).image_variants, '')
+        self.client.post(edit_url, {'text': 'Новая картинка',
+                                    'image': upload('other.gif')})
+        self.assertEqual(Post.objects.get(pk=post.pk).image_variants, '')
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_synchronous_mode(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=upload())
+        post.refresh_from_db()
+        self.assertNotEqual(post.image_variants, '')
+
+    def test_generate_thumbnails_command(self):
+        posts = [Post.objects.create(text=f'Пост {number}', author=self.user,
+                                     image=upload())
+                 for number in range(3)]
+        Post.objects.create(text='Без картинки', author=self.user)
+        out = StringIO()
+        call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn('Обработано картинок: 3', out.getvalue())
+        for post in posts:
+            post.refresh_from_db()
+            self.assertNotEqual(post.image_variants, '')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=2)
+class ThumbnailQueueTests(TransactionTestCase):
+    def test_queued_after_commit(self):
+        user = User.objects.create_user(username=NAME)
+        with mock.patch.object(thumbnails, 'executor') as executor:
+            post = Post.objects.create(text='Пост', author=user,
+                                       image=upload())
+        executor().submit.assert_called_once_with(
+            thumbnails._run, post.pk, mock.ANY)
+
+    def test_job_keeps_media_root_of_request(self):
+        """Задача пишет в MEDIA_ROOT, действовавший при постановке в
+        очередь, даже если к её запуску настройки сменились."""
+        user = User.objects.create_user(username=NAME)
+        with mock.patch.object(thumbnails, 'executor') as executor:
+            post = Post.objects.create(text='Пост', author=user,
+                                       image=upload())
+        job = executor().submit.call_args[0]
+        other = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=other):
+            job[0](*job[1:])
+        post.refresh_from_db()
+        found = variants.decode(post.image_variants)
+        self.assertTrue(found)
+        self.assertTrue(os.path.exists(
+            os.path.join(MEDIA_ROOT, found[0]['webp'])))
+        self.assertEqual(os.listdir(other), [])
+
+    def test_command_builds_in_parallel(self):
+        user = User.objects.create_user(username=NAME)
+        with mock.patch.object(thumbnails, 'schedule'):
+            for number in range(4):
+                Post.objects.create(text=f'Пост {number}', author=user,
+                                    image=upload())
+        out = StringIO()
+        call_command('generate_thumbnails', workers=2, stdout=out)
+        self.assertIn('Обработано картинок: 4', out.getvalue())
+        self.assertFalse(Post.objects.filter(image_variants='').exists())
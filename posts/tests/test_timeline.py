@@ -0,0 +1,151 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, User, UserStats
+from posts.paginator import NEXT
+from posts.timeline import TimelinePaginator
+
+NAME = 'test'
+NAME2 = 'test2'
+
+FOLLOW_INDEX_URL = reverse('follow_index')
+PROFILE_FOLLOW_URL = reverse('profile_follow', kwargs={'username': NAME2})
+PROFILE_UNFOLLOW_URL = reverse('profile_unfollow',
+                               kwargs={'username': NAME2})
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.author = User.objects.create_user(username=NAME2)
+        cls.old_post = Post.objects.create(text='Old', author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed(self):
+        response = self.authorized_client.get(FOLLOW_INDEX_URL)
+        return list(response.context['page'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        self.authorized_client.get(PROFILE_FOLLOW_URL)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=self.old_post).exists())
+        self.assertEqual(self.feed(), [self.old_post])
+        self.authorized_client.get(PROFILE_UNFOLLOW_URL)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_post_is_fanned_out(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='New', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_feed_does_not_join_follows(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            self.feed()
+        feed_sql = [query['sql'] for query in queries
+                    if 'posts_timelineentry' in query['sql']]
+        self.assertTrue(feed_sql)
+        for sql in feed_sql:
+            self.assertNotIn('JOIN "posts_follow"', sql)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_high_follower_author_is_merged_on_read(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='New', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_rebuild_command_restores_entries(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_rebuild_command_drops_stale_entries(self):
+        other = User.objects.create_user(username='other')
+        stale = Post.objects.create(text='Stale', author=other)
+        Follow.objects.create(user=self.user, author=self.author)
+        # Подписка, удалённая без сигналов, оставила записи в ленте.
+        Follow.objects.create(user=self.user, author=other)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_follow WHERE author_id = %s',
+                           [other.pk])
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertFalse(TimelineEntry.objects.filter(post=stale).exists())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_follow_backfills_with_one_insert(self):
+        for number in range(5):
+            Post.objects.create(text=f'Post {number}', author=self.author)
+        inserts = []
+
+        def log(execute, sql, *args):
+            if sql.startswith('INSERT') and 'posts_timelineentry' in sql:
+                inserts.append(sql)
+            return execute(sql, *args)
+
+        with connection.execute_wrapper(log):
+            self.authorized_client.get(PROFILE_FOLLOW_URL)
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 6)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulled_posts_are_merged_across_pages(self):
+        regular = User.objects.create_user(username='regular')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=regular)
+        UserStats.objects.filter(user=regular).update(followers_count=0)
+        for number in range(12):
+            Post.objects.create(text=f'Post {number}',
+                                author=(self.author, regular)[number % 2])
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=self.user).count(), 6)
+        expected = list(Post.objects.filter(
+            author__in=[self.author, regular]).order_by('-pub_date', '-id'))
+        for mode in ('page', 'cursor'):
+            with self.subTest(mode=mode), \
+                    override_settings(FEED_PAGINATION=mode):
+                response = self.authorized_client.get(FOLLOW_INDEX_URL)
+                page = response.context['page']
+                self.assertEqual(response.context['paginator'].count,
+                                 len(expected))
+                params = ({'cursor': page.next_cursor} if mode == 'cursor'
+                          else {'page': 2})
+                second = self.authorized_client.get(
+                    FOLLOW_INDEX_URL, params).context['page']
+                self.assertEqual(list(page) + list(second), expected)
+
+    @skipUnless(connection.vendor == 'sqlite',
+                'EXPLAIN QUERY PLAN есть у SQLite')
+    def test_feed_is_one_index_range(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        paginator = TimelinePaginator(self.user, 10)
+        cursor = paginator.encode_cursor(
+            TimelineEntry.objects.get(user=self.user), NEXT)
+        _, values = paginator.decode_cursor(cursor)
+        for condition in (Q(), paginator._keyset(values, 'lt')):
+            queryset = paginator.object_list.filter(condition).order_by(
+                '-pub_date', '-post_id')[:11]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            self.assertTrue(any('timeline_user_pub_date_idx' in step
+                                for step in plan), plan)
+            self.assertFalse(any('TEMP B-TREE' in step for step in plan),
+                             plan)
@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts import trending
+from posts.models import Comment, Like, Post, User
+
+NAME = 'test'
+POPULAR_URL = reverse('popular')
+API_POPULAR_URL = '/api/v1/posts/popular/'
+HOUR = 60 * 60
+# Начало эпохи при TRENDING_PERIOD = HOUR.
+START = 1000 * HOUR
+
+
+def score(post):
+    post.refresh_from_db()
+    return post.hot_score
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+        cls.readers = [User.objects.create_user(username=f'reader{number}')
+                       for number in range(3)]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.readers[0])
+        self.liked = Post.objects.create(text='Лайки', author=self.user)
+        self.commented = Post.objects.create(text='Обсуждение',
+                                             author=self.user)
+        self.quiet = Post.objects.create(text='Тишина', author=self.user)
+        for reader in self.readers:
+            Like.objects.create(post=self.liked, author=reader)
+        Comment.objects.create(post=self.commented, author=self.user,
+                               text='Комментарий')
+
+    def test_views_update_score(self):
+        post = self.quiet
+        self.client.get(reverse('post_like', args=[NAME, post.pk]))
+        self.assertGreaterEqual(score(post), trending.LIKE)
+        self.client.get(reverse('post_delete_like', args=[NAME, post.pk]))
+        self.assertAlmostEqual(score(post), 0, places=3)
+        self.client.post(reverse('add_comment', args=[NAME, post.pk]),
+                         {'text': 'Комментарий'})
+        self.assertGreaterEqual(score(post), trending.COMMENT)
+
+    def test_popular_feed_is_ranked(self):
+        response = self.client.get(POPULAR_URL)
+        self.assertEqual([post.pk for post in response.context['page']],
+                         [self.liked.pk, self.commented.pk])
+
+    def test_api_popular(self):
+        client = APIClient()
+        response = client.get(API_POPULAR_URL, {'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.liked.pk])
+        data = client.get(data['next']).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.commented.pk])
+        self.assertIsNone(data['next'])
+
+    @override_settings(TRENDING_PERIOD=HOUR, TRENDING_HALF_LIFE=HOUR)
+    def test_decay_touches_only_active_posts(self):
+        Post.objects.update(hot_score=0, hot_epoch=0)
+        trending.add([self.liked.pk], 1.0, now=START)
+        self.assertAlmostEqual(score(self.liked), 1.0)
+        self.assertEqual(trending.decay(now=START + HOUR), (1, 0))
+        self.assertAlmostEqual(score(self.liked), 0.5)
+        # Событие через полчаса весит больше на величину остывания.
+        trending.add([self.liked.pk], 1.0, now=START + 1.5 * HOUR)
+        self.assertAlmostEqual(score(self.liked), 0.5 + 2 ** 0.5)
+        self.assertEqual(trending.decay(now=START + 7 * HOUR), (1, 1))
+        self.assertEqual(score(self.liked), 0)
+        self.assertEqual(trending.decay(now=START + 8 * HOUR), (0, 0))
+
+    def test_decay_command(self):
+        out = StringIO()
+        call_command('decay_trending', stdout=out)
+        self.assertIn('Пересчитано постов:', out.getvalue())
@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from posts.forms import PostForm
+from posts.models import Post, User
+from posts.uploads import TOO_LARGE, TOO_MANY_PIXELS
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+NAME = 'test'
+NEW_POST_URL = reverse('new_post')
+API_POSTS_URL = '/api/v1/posts/'
+MEDIA_ROOT = tempfile.mkdtemp()
+
+# Запускается в отдельном процессе: ru_maxrss — пик за всю жизнь
+# процесса, и память тестового процесса его бы исказила.
+MEASURE = '''
+import json, os, resource, sys
+import django
+django.setup()
+from django.core.files.uploadedfile import UploadedFile
+from posts.forms import PostForm
+
+path = sys.argv[1]
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open(path, 'rb') as file:
+    upload = UploadedFile(file, 'big.jpg', 'image/jpeg',
+                          os.path.getsize(path))
+    result = PostForm().fields['image'].clean(upload)
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'peak_kb': after - before, 'size': result.size}))
+'''
+GENERATE = '''
+import sys
+from PIL import Image
+width, height = int(sys.argv[2]), int(sys.argv[3])
+Image.radial_gradient('L').resize((width, height)).convert('RGB').save(
+    sys.argv[1], quality=85)
+'''
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def image_file(size=(20, 10), image_format='JPEG', name='image.jpg',
+               **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format=image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type=f'image/{image_format.lower()}')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BoundedImageFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=NAME)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_small_clean_image_is_stored_as_is(self):
+        upload = image_file()
+        form = PostForm({'text': 'Текст'}, {'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    @override_settings(IMAGE_MAX_BYTES=1024)
+    def test_too_large_file_is_rejected_by_view(self):
+        """Файл больше лимита отклоняется, пост не создаётся."""
+        upload = image_file((200, 200), 'PNG', 'image.png',
+                            compress_level=0)
+        response = self.client.post(NEW_POST_URL,
+                                    {'text': 'Текст', 'image': upload})
+        self.assertFormError(response, 'form', 'image',
+                             TOO_LARGE.format(limit=0))
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_is_rejected_before_decode(self):
+        form = PostForm({'text': 'Текст'}, {'image': image_file((50, 50))})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['image'],
+                         [TOO_MANY_PIXELS.format(limit=0)])
+
+    @override_settings(IMAGE_MAX_FULL_DECODE_PIXELS=1000)
+    def test_full_decode_formats_have_lower_limit(self):
+        """PNG нельзя декодировать уменьшенным — лимит для него ниже."""
+        png = PostForm({'text': 'Текст'},
+                       {'image': image_file((50, 50), 'PNG', 'image.png')})
+        jpeg = PostForm({'text': 'Текст'}, {'image': image_file((50, 50))})
+        self.assertFalse(png.is_valid())
+        self.assertTrue(jpeg.is_valid(), jpeg.errors)
+
+    def test_metadata_is_stripped(self):
+        exif = Image.Exif()
+        exif[0x0131] = 'Камера'
+        exif[0x010F] = 'Производитель'
+        upload = image_file(exif=exif.tobytes())
+        form = PostForm({'text': 'Текст'}, {'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (20, 10))
+
+    @override_settings(IMAGE_MAX_SIDE=16)
+    def test_large_image_is_downscaled(self):
+        form = PostForm({'text': 'Текст'}, {'image': image_file((64, 32))})
+        self.assertTrue(form.is_valid(), form.errors)
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual(image.size, (16, 8))
+            self.assertEqual(image.format, 'JPEG')
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_api_rejects_too_many_pixels(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            API_POSTS_URL,
+            {'text': 'Текст', 'image': image_file((50, 50))},
+            format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+        self.assertFalse(Post.objects.exists())
+
+
+@unittest.skipIf(resource is None, 'нужен модуль resource')
+class UploadMemoryTests(unittest.TestCase):
+    """Пик памяти при приёме 50-мегапиксельного JPEG не больше, чем
+    у обычной фотографии: декодируется уже уменьшенная картинка."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def run_python(self, code, *args):
+        env = dict(os.environ,
+                   DJANGO_SETTINGS_MODULE='yatube.settings',
+                   PYTHONPATH=str(settings.BASE_DIR))
+        return subprocess.run(
+            [sys.executable, '-c', code, *map(str, args)],
+            check=True, capture_output=True, text=True, env=env,
+            cwd=settings.BASE_DIR,
+        ).stdout
+
+    def peak_kb(self, width, height):
+        path = os.path.join(self.directory, f'{width}x{height}.jpg')
+        self.run_python(GENERATE, path, width, height)
+        return json.loads(self.run_python(MEASURE, path))['peak_kb']
+
+    def test_peak_memory_is_flat_for_50_megapixels(self):
+        photo = self.peak_kb(4000, 3000)
+        huge = self.peak_kb(8660, 5774)
+        # Полное декодирование 50 Мп в RGBX заняло бы ~200 МБ.
+        full_decode_kb = 8660 * 5774 * 4 // 1024
+        self.assertLess(huge, full_decode_kb * 0.6)
+        self.assertLess(huge, photo * 1.25)
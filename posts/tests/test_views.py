@@ -230,10 +230,8 @@ class PostPagesTests(TestCase):
         # Удостоверимся, что на странице index работает cash  на вывод постов
         response = self.authorized_client.get(INDEX_URL)
         content_cash = response.content
-        self.post2 = Post.objects.create(
-            text='Test_cash',
-            author=self.user,
-        )
+        # update() не шлёт сигналов, поэтому фрагмент не сбрасывается
+        Post.objects.filter(pk=self.post.pk).update(text='Test_cash')
         response = self.authorized_client.get(INDEX_URL)
         content_new = response.content
         comments_count_response = response.content
@@ -0,0 +1,118 @@
+"""Фоновая подготовка вариантов картинок постов.
+
+После сохранения поста с новой картинкой её варианты (см.
+posts/variants.py) ставятся в очередь пула потоков (локальная замена
+очереди задач) и строятся вне запроса. Пока вариантов нет, шаблон
+показывает заглушку. При THUMBNAIL_WORKERS = 0 варианты строятся
+сразу, в том же процессе; так они строятся в тестах и бенчмарках.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import get_storage_class
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps
+
+from . import cache, variants
+from .models import Post
+
+SAVE_OPTIONS = {
+    'jpeg': {'quality': 80, 'optimize': True, 'progressive': True},
+    'webp': {'quality': 75, 'method': 4},
+}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def workers():
+    return settings.THUMBNAIL_WORKERS
+
+
+def media_storage():
+    """Хранилище с MEDIA_ROOT, действующим в момент вызова.
+
+    default_storage перечитывает MEDIA_ROOT после смены настроек, а
+    фоновый поток должен писать туда, куда смотрел поставивший его
+    в очередь запрос.
+    """
+    return get_storage_class()(location=settings.MEDIA_ROOT,
+                               base_url=settings.MEDIA_URL)
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers(),
+                                       thread_name_prefix='thumbnails')
+    return _executor
+
+
+def _save(storage, name, image, fmt):
+    buffer = BytesIO()
+    image.save(buffer, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_variants(post, storage):
+    """Сохраняет варианты картинки поста, возвращает строку для
+    Post.image_variants."""
+    digest = hashlib.md5(post.image.name.encode()).hexdigest()[:12]
+    base = f'variants/{post.pk}/{digest}'
+    with storage.open(post.image.name, 'rb') as file, \
+            Image.open(file) as source:
+        widest = max(variants.widths())
+        source.draft(None, variants.size(widest))
+        cover = ImageOps.fit(source.convert('RGB'), variants.size(widest),
+                             Image.LANCZOS)
+    sizes = []
+    for width in sorted(variants.widths()):
+        image = cover.resize(variants.size(width), Image.LANCZOS)
+        for fmt in variants.FORMATS:
+            _save(storage, variants.name(base, width, fmt), image, fmt)
+        sizes.append(image.size)
+    return variants.encode(base, sizes)
+
+
+def generate(post_id, storage=None):
+    """Строит варианты картинки поста; возвращает True, если они
+    сохранены."""
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id).first()
+    if post is None or not post.image:
+        return False
+    try:
+        value = build_variants(post, storage or media_storage())
+    except Exception:
+        logger.exception('Не удалось подготовить картинку поста %s', post_id)
+        return False
+    # Картинку могли заменить, пока строились варианты.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        image_variants=value)
+    if updated:
+        cache.invalidate_post(post, post.group.slug if post.group_id else None)
+    return bool(updated)
+
+
+def _run(post_id, storage):
+    close_old_connections()
+    try:
+        generate(post_id, storage)
+    finally:
+        connection.close()
+
+
+def schedule(post_id):
+    storage = media_storage()
+    if not workers():
+        generate(post_id, storage)
+        return
+    # Поток увидит пост и файл только после коммита.
+    transaction.on_commit(
+        lambda: executor().submit(_run, post_id, storage))
@@ -0,0 +1,176 @@
+"""Материализованная лента подписок.
+
+Посты обычных авторов раскладываются по лентам подписчиков при
+публикации (fan-out on write). Посты авторов, у которых подписчиков
+больше settings.TIMELINE_FANOUT_LIMIT, в ленты не копируются и
+подмешиваются при чтении (fan-out on read).
+
+Лента читается прямо из TimelineEntry в порядке индекса
+(user, -pub_date, -post); посты подмешиваемых авторов выбираются по тому
+же ключу (pub_date, id) и сливаются с ней при чтении.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginator import NEXT, CursorPaginator
+
+BATCH_SIZE = 500
+ORDERING = ('pub_date', 'post_id')
+
+
+def fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+
+
+def followers_count(author_id):
+    count = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first()
+    if count is None:
+        count = Follow.objects.filter(author_id=author_id).count()
+    return count
+
+
+def is_fanout_author(author_id):
+    return followers_count(author_id) <= fanout_limit()
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True,
+                                      batch_size=BATCH_SIZE)
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True)
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_ids, author_ids):
+    """Добавляет посты авторов в ленты перечисленных пользователей."""
+    posts = Post.objects.filter(author_id__in=author_ids).values_list(
+        'pk', 'author_id', 'pub_date')
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post_id,
+                      author_id=author_id, pub_date=pub_date)
+        for post_id, author_id, pub_date in posts.iterator()
+        for user_id in user_ids
+    )
+
+
+def rebuild(user_id):
+    """Собирает ленту пользователя заново по его текущим подпискам,
+    удаляя записи, оставшиеся от прежних."""
+    authors = [author_id for author_id in Follow.objects.filter(
+        user_id=user_id).values_list('author_id', flat=True)
+        if is_fanout_author(author_id)]
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    backfill([user_id], authors)
+
+
+def followed(user_id, author_id):
+    if is_fanout_author(author_id):
+        backfill([user_id], [author_id])
+
+
+def unfollowed(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id,
+                                 author_id=author_id).delete()
+    # Автор снова стал «обычным»: посты, опубликованные, пока
+    # он подмешивался при чтении, нужно разложить по лентам.
+    if followers_count(author_id) == fanout_limit():
+        followers = list(Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True))
+        backfill(followers, [author_id])
+
+
+def pulled_authors(user):
+    """Подписки пользователя, чьи посты подмешиваются при чтении."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=fanout_limit(),
+    ).values_list('author_id', flat=True))
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок пользователя по курсору (pub_date, post_id).
+
+    Записи подмешиваемых авторов в ленте не учитываются: их посты
+    выбираются по тому же ключу из индекса (author, -pub_date, -id),
+    и записи для них собираются на лету.
+    """
+
+    def __init__(self, user, per_page):
+        self.user = user
+        self.pulled = pulled_authors(user)
+        entries = TimelineEntry.objects.filter(user=user)
+        if self.pulled:
+            entries = entries.exclude(author_id__in=self.pulled)
+        super().__init__(entries, per_page, ORDERING)
+
+    def pulled_posts(self):
+        return Post.objects.filter(author_id__in=self.pulled)
+
+    @cached_property
+    def count(self):
+        count = self.object_list.count()
+        if self.pulled:
+            count += self.pulled_posts().count()
+        return count
+
+    def fetch(self, direction, values, limit):
+        rows = super().fetch(direction, values, limit)
+        if not self.pulled:
+            return rows
+        posts = CursorPaginator(
+            self.pulled_posts().only('pub_date', 'author_id'),
+            self.per_page, ('pub_date', 'id'))
+        rows += [TimelineEntry(user=self.user, post_id=post.pk,
+                               author_id=post.author_id,
+                               pub_date=post.pub_date)
+                 for post in posts.fetch(direction, values, limit)]
+        return sorted(rows,
+                      key=lambda entry: (entry.pub_date, entry.post_id),
+                      reverse=direction == NEXT)[:limit]
+
+
+class TimelineRows:
+    """Записи ленты для постраничного Paginator: срез [a:b] — первые
+    b записей тех же выборок, что у TimelinePaginator."""
+
+    def __init__(self, user):
+        self.source = TimelinePaginator(user, 0)
+
+    def count(self):
+        return self.source.count
+
+    def __getitem__(self, index):
+        return self.source.fetch(NEXT, None, index.stop)[index]
+
+
+def paginate(request, per_page):
+    """Как paginator.paginate, но по записям ленты; на странице они
+    заменяются постами."""
+    if getattr(settings, 'FEED_PAGINATION', 'page') == 'cursor':
+        paginator = TimelinePaginator(request.user, per_page)
+        page = paginator.get_page(request.GET.get('cursor'))
+    else:
+        paginator = Paginator(TimelineRows(request.user), per_page)
+        page = paginator.get_page(request.GET.get('page'))
+    posts = Post.objects.for_feed().in_bulk(
+        [entry.post_id for entry in page])
+    posts = [posts[entry.post_id] for entry in page
+             if entry.post_id in posts]
+    if getattr(paginator, 'is_cursor', False):
+        page.resolve(posts)
+    else:
+        page.object_list = posts
+    return paginator, page
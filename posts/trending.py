@@ -0,0 +1,85 @@
+"""Популярные посты: рейтинг с экспоненциальным затуханием.
+
+Каждый лайк и комментарий добавляет к Post.hot_score свой вес, который
+вдвое «остывает» за TRENDING_HALF_LIFE секунд. Время разбито на эпохи
+по TRENDING_PERIOD секунд, и hot_score хранится как значение на начало
+эпохи hot_epoch: событие пересчитывает рейтинг поста к текущей эпохе и
+прибавляет вес в том же UPDATE, что и счётчики (posts/counters.py),
+без агрегатов по лайкам и комментариям.
+
+Команда ``python manage.py decay_trending`` (раз в эпоху, по cron)
+приводит к текущей эпохе посты, давно не получавшие событий, и
+обнуляет остывшие. Она проходит только по hot_score > 0 — это диапазон
+индекса, то есть недавно активные посты.
+"""
+import time
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Power
+
+from . import cache
+from .models import Post
+
+LIKE = 1.0
+COMMENT = 2.0
+# Ниже этого рейтинг считается остывшим и сбрасывается в ноль.
+MIN_SCORE = 0.05
+ORDERING = ('hot_score', 'id')
+
+
+def half_life():
+    return getattr(settings, 'TRENDING_HALF_LIFE', 12 * 60 * 60)
+
+
+def period():
+    return getattr(settings, 'TRENDING_PERIOD', 60 * 60)
+
+
+def current_epoch(now=None):
+    return int((time.time() if now is None else now) // period())
+
+
+def _rescaled(epoch):
+    """hot_score, пересчитанный с эпохи hot_epoch на epoch."""
+    elapsed = (Value(epoch) - F('hot_epoch')) * Value(period())
+    return F('hot_score') * Power(Value(0.5), elapsed / Value(
+        float(half_life())))
+
+
+def score_updates(weight, now=None):
+    """Выражения для UPDATE, прибавляющие вес события к рейтингу
+    (вычитающие, если вес отрицательный)."""
+    now = time.time() if now is None else now
+    epoch = current_epoch(now)
+    # Событие внутри эпохи весит больше, чем на её начало.
+    weight *= 0.5 ** (-(now - epoch * period()) / half_life())
+    return {
+        'hot_score': Greatest(_rescaled(epoch) + Value(weight), Value(0.0)),
+        'hot_epoch': epoch,
+    }
+
+
+def add(post_ids, weight, now=None):
+    Post.objects.filter(pk__in=post_ids).update(
+        **score_updates(weight, now))
+
+
+def decay(now=None):
+    """Приводит активные посты к текущей эпохе, возвращает
+    (число пересчитанных, число остывших)."""
+    epoch = current_epoch(now)
+    active = Post.objects.filter(hot_score__gt=0)
+    decayed = active.filter(hot_epoch__lt=epoch).update(
+        hot_score=_rescaled(epoch), hot_epoch=epoch)
+    cooled = active.filter(hot_score__lt=MIN_SCORE).update(hot_score=0)
+    if decayed or cooled:
+        # Порядок в /api/v1/posts/popular/ мог измениться.
+        cache.bump(cache.POSTS)
+    return decayed, cooled
+
+
+def popular(queryset=None):
+    if queryset is None:
+        queryset = Post.objects.for_feed()
+    return queryset.filter(hot_score__gt=0)
@@ -0,0 +1,168 @@
+"""Приём картинок постов с ограничением памяти.
+
+Размер файла ограничивается ещё при приёме запроса
+(UploadSizeLimitHandler дальше лимита данные не сохраняет), а число
+пикселей — по заголовку, до декодирования (BoundedImageField). Картинки
+с метаданными или больше IMAGE_MAX_SIDE пересохраняются без EXIF/XMP;
+JPEG при этом декодируется сразу в уменьшенном виде (Image.draft),
+так что пиковая память не зависит от разрешения исходника.
+"""
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image, ImageOps
+
+TOO_LARGE = 'Файл больше {limit} МБ.'
+TOO_MANY_PIXELS = 'Картинка больше {limit} мегапикселей.'
+# Форматы, которые Pillow умеет декодировать сразу уменьшенными.
+DRAFT_FORMATS = ('JPEG',)
+# Метаданные, которые не сохраняются: EXIF (в том числе координаты),
+# XMP, комментарии. Цветовой профиль остаётся, иначе исказятся цвета.
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment',
+                 'Comment', 'Description', 'Software')
+ORIENTATION = 0x0112
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def max_bytes():
+    return getattr(settings, 'IMAGE_MAX_BYTES', 20 * 1024 * 1024)
+
+
+def max_pixels(image_format):
+    if image_format in DRAFT_FORMATS:
+        return getattr(settings, 'IMAGE_MAX_PIXELS', 100_000_000)
+    return getattr(settings, 'IMAGE_MAX_FULL_DECODE_PIXELS', 16_000_000)
+
+
+def max_side():
+    return getattr(settings, 'IMAGE_MAX_SIDE', 2560)
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Файл, превысивший лимит: содержимого нет, есть только размер."""
+
+    def __init__(self, name, content_type, size, charset,
+                 content_type_extra=None):
+        super().__init__(BytesIO(), name, content_type, size, charset,
+                         content_type_extra)
+
+
+class UploadSizeLimitHandler(FileUploadHandler):
+    """Первый в FILE_UPLOAD_HANDLERS: после IMAGE_MAX_BYTES перестаёт
+    передавать данные остальным обработчикам."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > max_bytes():
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received <= max_bytes():
+            return None
+        return OversizedUploadedFile(self.file_name, self.content_type,
+                                     self.received, self.charset,
+                                     self.content_type_extra)
+
+
+def has_metadata(image):
+    return any(key in image.info for key in METADATA_KEYS)
+
+
+def reencode(upload):
+    """Пересохраняет картинку без метаданных и не больше IMAGE_MAX_SIDE.
+
+    Возвращает новый файл или None, если исходник можно оставить как есть.
+    """
+    upload.seek(0)
+    buffer = BytesIO()
+    with Image.open(upload) as image:
+        image_format = image.format
+        side = max_side()
+        if max(image.size) <= side and not has_metadata(image):
+            return None
+        options = dict(SAVE_OPTIONS.get(image_format, {}))
+        if image.info.get('icc_profile'):
+            options['icc_profile'] = image.info['icc_profile']
+        rotated = image.getexif().get(ORIENTATION, 1) != 1
+        # Для JPEG декодер сразу уменьшает картинку в 2, 4 или 8 раз,
+        # но не меньше итогового размера; остальные форматы
+        # декодируются целиком, поэтому для них лимит пикселей ниже.
+        ratio = min(1, side / max(image.size))
+        image.draft(None, (max(1, int(image.width * ratio)),
+                           max(1, int(image.height * ratio))))
+        if rotated:
+            image = ImageOps.exif_transpose(image)
+        image.thumbnail((side, side), Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(buffer, format=image_format, **options)
+    upload.seek(0)
+    return SimpleUploadedFile(upload.name, buffer.getvalue(),
+                              upload.content_type)
+
+
+def check_pixels(data):
+    try:
+        # Image.open читает только заголовок.
+        with Image.open(data) as image:
+            pixels = image.size[0] * image.size[1]
+            limit = max_pixels(image.format)
+    except Image.DecompressionBombError:
+        pixels, limit = float('inf'), max_pixels(None)
+    except Exception:
+        # Нераспознанный файл отклонит проверка ImageField.
+        return
+    finally:
+        data.seek(0)
+    if pixels > limit:
+        raise forms.ValidationError(
+            TOO_MANY_PIXELS.format(limit=limit // 1_000_000),
+            code='too_many_pixels')
+
+
+def check_upload(data):
+    """Проверяет размер файла и число пикселей до декодирования."""
+    if data and data.size is not None and data.size > max_bytes():
+        raise forms.ValidationError(
+            TOO_LARGE.format(limit=max_bytes() // (1024 * 1024)),
+            code='file_too_large')
+    if data and hasattr(data, 'read'):
+        check_pixels(data)
+
+
+def bounded(to_python):
+    """Оборачивает ImageField.to_python проверками и пересохранением."""
+
+    def wrapper(data):
+        check_upload(data)
+        upload = to_python(data)
+        if upload is None:
+            return upload
+        return reencode(upload) or upload
+
+    return wrapper
+
+
+def limit_image_field(field):
+    """Подключает лимиты к уже созданному forms.ImageField формы."""
+    field.to_python = bounded(field.to_python)
+    return field
+
+
+class BoundedImageField(forms.ImageField):
+    """ImageField, проверяющий размер и разрешение до декодирования."""
+
+    def to_python(self, data):
+        return bounded(super().to_python)(data)
@@ -15,6 +15,15 @@ urlpatterns = [
     path('new/',
          views.new_post,
          name='new_post'),
+    path('tag/<str:tag>/',
+         views.tag_posts,
+         name='tag_posts'),
+    path('popular/',
+         views.popular,
+         name='popular'),
+    path('search/',
+         views.search_posts,
+         name='search'),
     path("follow/",
          views.follow_index,
          name="follow_index"),
@@ -35,6 +44,9 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path("<str:username>/<int:post_id>/comment",
          views.add_comment,
          name="add_comment"),
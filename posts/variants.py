@@ -0,0 +1,54 @@
+"""Варианты картинки поста разной ширины в JPEG и WebP.
+
+Сведения о готовых вариантах хранятся в Post.image_variants компактной
+JSON-строкой: общий префикс имён, пары (ширина, высота) и форматы.
+Имя файла варианта — ``<префикс>_<ширина>.<формат>``.
+"""
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+# Пропорции обложки в ленте, как у прежнего превью 960x339.
+WIDTH, HEIGHT = 960, 339
+FORMATS = ('webp', 'jpeg')
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def widths():
+    return tuple(settings.IMAGE_VARIANT_WIDTHS)
+
+
+def size(width):
+    return width, round(width * HEIGHT / WIDTH)
+
+
+def name(base, width, fmt):
+    return f'{base}_{width}.{EXTENSIONS[fmt]}'
+
+
+def encode(base, sizes, formats=FORMATS):
+    return json.dumps({'b': base, 's': sizes, 'f': list(formats)},
+                      separators=(',', ':'))
+
+
+def decode(value):
+    """Список вариантов от узкого к широкому:
+    [{'width': 320, 'height': 113, 'webp': <имя>, 'jpeg': <имя>}, ...]."""
+    if not value:
+        return []
+    data = json.loads(value)
+    return [
+        {'width': width, 'height': height,
+         **{fmt: name(data['b'], width, fmt) for fmt in data['f']}}
+        for width, height in data['s']
+    ]
+
+
+def urls(value):
+    return [
+        {key: default_storage.url(item) if key in FORMATS else item
+         for key, item in variant.items()}
+        for variant in decode(value)
+    ]
+
@@ -1,34 +1,87 @@
 from django.conf.urls import handler404, handler500
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 
+from . import cache, likes, search, tags, timeline, trending
+from .counters import get_user_stats
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User, Like
+from .models import Comment, Follow, Group, Post, Tag, User
+from .paginator import (
+    COMMENT_ORDERING,
+    CursorPaginator,
+    InvalidCursor,
+    paginate,
+)
 
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 10
 
+
+@cache.anonymous_page(lambda: (cache.INDEX,))
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    paginator, page = paginate(request, post_list, POSTS_PER_PAGE)
     return render(
         request,
         'index.html',
-        {'page': page, 'paginator': paginator}
+        {
+            'page': page,
+            'paginator': paginator,
+            'cache_key': cache.feed_cache_key(request, page, cache.INDEX),
+        }
     )
 
 
+@cache.anonymous_page(lambda slug: (cache.group_scope(slug),))
 def group_post(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = group.posts.for_feed()
+    paginator, page = paginate(request, post_list, POSTS_PER_PAGE)
     return render(request, 'group.html', {
         'group': group,
         'page': page,
         'paginator': paginator,
+        'cache_key': cache.feed_cache_key(
+            request, page, cache.group_scope(group.slug)),
+    })
+
+
+def popular(request):
+    # Рейтинг меняется постоянно, поэтому только по курсору: номера
+    # страниц поплыли бы между запросами.
+    paginator = CursorPaginator(trending.popular(), POSTS_PER_PAGE,
+                                ordering=trending.ORDERING)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'popular.html', {
+        'page': page,
+        'paginator': paginator,
+    })
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    # Выдача ранжирована по релевантности, поэтому только постранично.
+    paginator = Paginator(search.search(query), POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {
+        'query': query,
+        'page': page,
+        'paginator': paginator,
+    })
+
+
+def tag_posts(request, tag):
+    tag = get_object_or_404(Tag, name=tag.lower())
+    paginator = tags.tag_paginator(tag, POSTS_PER_PAGE)
+    page = tags.resolve_posts(paginator.get_page(request.GET.get('cursor')))
+    return render(request, 'tag.html', {
+        'tag': tag,
+        'page': page,
+        'paginator': paginator,
     })
 
 
@@ -38,44 +91,80 @@ def new_post(request):
     if not form.is_valid():
         return render(request, 'new_post.html', {'form': form})
     form.instance.author = request.user
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('index')
 
 
+@cache.anonymous_page(lambda username: (cache.author_scope(username),))
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = author.posts.for_feed()
+    paginator, page = paginate(request, post_list, POSTS_PER_PAGE)
     following = (request.user.is_authenticated and
                  author != request.user and
                  Follow.objects.filter(author=author,
                                        user=request.user).exists())
     return render(request, 'profile.html', {
         'author': author,
+        'stats': get_user_stats(author),
         'page': page,
         'paginator': paginator,
         'following': following,
+        'cache_key': cache.feed_cache_key(
+            request, page, cache.author_scope(author.username)),
     })
 
 
+@cache.anonymous_page(lambda username, post_id: (
+    cache.post_scope(post_id), cache.comments_scope(post_id)))
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = post.comments.all()
+    post = get_object_or_404(Post.objects.for_feed(),
+                             id=post_id,
+                             author__username=username)
+    paginator = comments_paginator(post.pk)
+    try:
+        comments = paginator.queryset_page(request.GET.get('comments'))
+    except InvalidCursor:
+        comments = paginator.queryset_page()
     form = CommentForm(request.POST or None)
     like = (request.user.is_authenticated and
-            Like.objects.filter(author__username=request.user.username,
-                                post=post).exists())
+            likes.is_liked(post.pk, request.user.pk))
     return render(request, 'post.html', {
         'post': post,
         'author': post.author,
+        'stats': get_user_stats(post.author),
         'form': form,
-        'comments': comments,
+        'comments': comments.object_list,
+        'comments_page': comments,
         'like': like,
     })
 
 
+def comments_paginator(post_id):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author')
+    return CursorPaginator(comments, COMMENTS_PER_PAGE, COMMENT_ORDERING)
+
+
+@cache.anonymous_page(lambda username, post_id: (
+    cache.post_scope(post_id), cache.comments_scope(post_id)))
+def post_comments(request, username, post_id):
+    """Следующая страница комментариев для кнопки «Показать ещё»:
+    готовый HTML и курсор продолжения."""
+    if not Post.objects.filter(id=post_id,
+                               author__username=username).exists():
+        raise Http404
+    try:
+        comments = comments_paginator(post_id).queryset_page(
+            request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404
+    html = render_to_string('comment_list.html', {'comments': comments},
+                            request)
+    return JsonResponse({'html': html, 'next': comments.next_cursor})
+
+
 @login_required
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
@@ -87,7 +176,8 @@ def add_comment(request, username, post_id):
                        'post': post})
     form.instance.author = request.user
     form.instance.post = post
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('post', username, post_id)
 
 
@@ -104,32 +194,31 @@ def post_edit(request, username, post_id):
     if not form.is_valid():
         return render(request, "new_post.html", {'form': form, 'post': post})
     form.instance.author = request.user
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('post', username, post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = timeline.paginate(request, POSTS_PER_PAGE)
     return render(request, 'follow.html', {
         'page': page,
         'paginator': paginator,
+        'cache_key': cache.feed_cache_key(
+            request, page, cache.INDEX, cache.follow_scope(request.user.pk)),
     })
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if author != request.user and not Follow.objects.filter(
-            author=author,
-            user=request.user).exists():
-        Follow.objects.create(
-            user=request.user,
-            author=author,
-        )
+    if author != request.user:
+        with transaction.atomic():
+            Follow.objects.get_or_create(
+                user=request.user,
+                author=author,
+            )
     return redirect('profile', username=username)
 
 
@@ -163,19 +252,14 @@ def server_error(request):
 
 @login_required
 def post_like(request, username, post_id):
-    author = get_object_or_404(User, username=request.user)
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    Like.objects.get_or_create(
-                post=post,
-                author=author,
-            )
+    if not likes.like(post_id, request.user.pk, username):
+        # Лайк уже стоял, отложен в буфер или поста нет.
+        get_object_or_404(Post, id=post_id, author__username=username)
     return redirect('post', username, post_id)
 
 
 @login_required
 def post_delete_like(request, username, post_id):
-    like = get_object_or_404(Like,
-                             author=request.user,
-                             post__id=post_id)
-    like.delete()
+    if not likes.unlike(post_id, request.user.pk):
+        get_object_or_404(Post, id=post_id, author__username=username)
     return redirect('post', username, post_id)
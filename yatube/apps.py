@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class YatubeConfig(AppConfig):
+    name = 'yatube'
+
+    def ready(self):
+        from . import checks  # noqa: F401 — регистрирует проверки
+        from . import db
+        db.connect_signals()
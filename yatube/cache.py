@@ -0,0 +1,127 @@
+"""Обёртка над бэкендом кэша, считающая попадания и промахи.
+
+Счётчики копятся в памяти процесса и периодически сливаются в сам
+кэш, поэтому при общем бэкенде (redis, memcached, файлы) статистика
+собирается со всех воркеров. Посмотреть её можно командой
+``python manage.py cache_stats``.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+STATS_KEY = 'cache-stats'
+FLUSH_EVERY = 100
+FLUSH_INTERVAL = 10
+
+
+def key_prefix(key):
+    """Группа ключа: 'generation:index' -> 'generation',
+    'template.cache.post_item.<md5>' -> 'template.cache.post_item'."""
+    if key.startswith('template.cache.'):
+        return key.rsplit('.', 1)[0]
+    return re.split(r'[:|]', key, 1)[0]
+
+
+class InstrumentedCache:
+    """Проксирует все вызовы в TARGET_BACKEND, считая get-запросы."""
+
+    def __init__(self, location, params):
+        params = dict(params)
+        backend = params.pop('TARGET_BACKEND')
+        self._cache = import_string(backend)(location, params)
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+    def __contains__(self, key):
+        return self.has_key(key)
+
+    def _record(self, key, hit):
+        metrics.record_cache(hit)
+        with self._lock:
+            self._pending[(key_prefix(key), 'hits' if hit else 'misses')] += 1
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = self._cache.get(key, sentinel, version=version)
+        self._record(key, value is not sentinel)
+        return default if value is sentinel else value
+
+    def get_many(self, keys, version=None):
+        found = self._cache.get_many(keys, version=version)
+        for key in keys:
+            self._record(key, key in found)
+        return found
+
+    def get_or_set(self, key, default, timeout=None, version=None):
+        sentinel = object()
+        value = self.get(key, sentinel, version=version)
+        if value is not sentinel:
+            return value
+        if callable(default):
+            default = default()
+        if default is not None:
+            self._cache.add(key, default, timeout=timeout, version=version)
+            return self._cache.get(key, default, version=version)
+        return default
+
+    def has_key(self, key, version=None):
+        found = self._cache.has_key(key, version=version)
+        self._record(key, found)
+        return found
+
+    def close(self, **kwargs):
+        # Вызывается по окончании каждого запроса.
+        if (sum(self._pending.values()) >= FLUSH_EVERY or
+                time.monotonic() - self._last_flush >= FLUSH_INTERVAL):
+            self.flush_stats()
+        self._cache.close(**kwargs)
+
+    def flush_stats(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        prefixes = set(self._cache.get(f'{STATS_KEY}:prefixes', ()))
+        for (prefix, kind), count in pending.items():
+            key = f'{STATS_KEY}:{prefix}:{kind}'
+            if not self._cache.add(key, count, None):
+                try:
+                    self._cache.incr(key, count)
+                except ValueError:
+                    self._cache.set(key, count, None)
+            prefixes.add(prefix)
+        self._cache.set(f'{STATS_KEY}:prefixes', sorted(prefixes), None)
+
+    def stats(self):
+        """{prefix: {'hits': n, 'misses': n}} по всем процессам."""
+        self.flush_stats()
+        prefixes = self._cache.get(f'{STATS_KEY}:prefixes', ())
+        keys = [f'{STATS_KEY}:{prefix}:{kind}'
+                for prefix in prefixes for kind in ('hits', 'misses')]
+        values = self._cache.get_many(keys)
+        return {
+            prefix: {
+                kind: values.get(f'{STATS_KEY}:{prefix}:{kind}', 0)
+                for kind in ('hits', 'misses')
+            }
+            for prefix in prefixes
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._pending.clear()
+        prefixes = self._cache.get(f'{STATS_KEY}:prefixes', ())
+        self._cache.delete_many(
+            [f'{STATS_KEY}:{prefix}:{kind}'
+             for prefix in prefixes for kind in ('hits', 'misses')] +
+            [f'{STATS_KEY}:prefixes'])
@@ -0,0 +1,22 @@
+"""Проверки настроек для ``python manage.py check --deploy``."""
+from django.conf import settings
+from django.core import checks
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Сброс кэша страниц (счётчики поколений в posts/cache.py) и ETag
+    API (api/conditional.py) верны, только если кэш общий для всех
+    процессов."""
+    cache = settings.CACHES['default']
+    if cache.get('TARGET_BACKEND', cache['BACKEND']) != LOCMEM:
+        return []
+    return [checks.Warning(
+        'Кэш locmem у каждого процесса свой: при нескольких воркерах '
+        'пользователи получат устаревшие страницы и ответы 304.',
+        hint='Задайте CACHE_BACKEND=redis, memcached или file, '
+             'либо запускайте один воркер.',
+        id='yatube.W001',
+    )]
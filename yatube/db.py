@@ -0,0 +1,54 @@
+"""Настройка соединений с базой данных."""
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+SQLITE_PRAGMAS = {
+    # WAL: читатели не блокируют писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В режиме WAL достаточно NORMAL: fsync только на контрольных точках.
+    'synchronous': 'NORMAL',
+    # Сколько миллисекунд ждать чужую блокировку записи.
+    'busy_timeout': 5000,
+    # Читать файл базы через mmap, 256 МБ.
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша страниц в КиБ.
+    'cache_size': -20000,
+}
+
+
+def sqlite_pragmas():
+    """SQLITE_PRAGMAS с поправками из settings.SQLITE_PRAGMAS;
+    значение None отключает прагму."""
+    pragmas = {**SQLITE_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    return {name: value for name, value in pragmas.items()
+            if value is not None}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые сервер успел оборвать;
+    Django откроет новые при первом обращении."""
+    if not getattr(settings, 'DB_HEALTH_CHECKS', True):
+        return
+    for connection in connections.all():
+        if (connection.connection is not None and
+                connection.settings_dict['CONN_MAX_AGE'] and
+                not connection.in_atomic_block and
+                not connection.is_usable()):
+            connection.close()
+
+
+def connect_signals():
+    connection_created.connect(configure_sqlite,
+                               dispatch_uid='yatube_configure_sqlite')
+    request_started.connect(check_connections,
+                            dispatch_uid='yatube_check_connections')
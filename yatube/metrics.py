@@ -0,0 +1,312 @@
+"""Метрики запросов в памяти процесса.
+
+MetricsMiddleware замеряет для каждого запроса общее время ответа,
+число запросов к БД и их время, время отрисовки шаблонов
+(бэкенд InstrumentedTemplates) и попадания в кэш (InstrumentedCache из
+yatube/cache.py). Последние METRICS_BUFFER_SIZE замеров каждого
+представления хранятся в кольцевом буфере, по нему считаются
+процентили. Страница ``/metrics/`` отдаёт их в текстовом формате
+Prometheus; доступ — персоналу сайта или по заголовку
+``Authorization: Bearer <METRICS_TOKEN>``.
+
+Запросы дольше METRICS_SLOW_MS попадают в журнал ``yatube.metrics`` и
+в список медленных (``/metrics/slow/``) вместе с текстом SQL — без
+параметров, чтобы в метрики не утекали данные пользователей.
+
+Буфер у каждого процесса свой: при нескольких воркерах Prometheus
+опрашивает их по отдельности.
+"""
+import hmac
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.9, 0.99)
+# Сколько запросов SQL одного HTTP-запроса держать для разбора.
+MAX_SQL = 100
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Представления самих метрик не замеряются.
+EXCLUDED_VIEWS = {'metrics', 'metrics_slow'}
+# Поле замера, имя метрики, описание.
+SUMMARIES = (
+    ('latency', 'request_duration_seconds', 'Время ответа'),
+    ('db_time', 'db_duration_seconds', 'Время запросов к БД'),
+    ('queries', 'db_queries', 'Число запросов к БД'),
+    ('template_time', 'template_duration_seconds',
+     'Время отрисовки шаблонов'),
+    ('cache_hits', 'cache_hits', 'Попадания в кэш'),
+    ('cache_misses', 'cache_misses', 'Промахи кэша'),
+)
+FIELDS = tuple(field for field, _, _ in SUMMARIES)
+
+_local = threading.local()
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+class Sample:
+    """Замер одного запроса; копится, пока запрос обрабатывается."""
+
+    __slots__ = FIELDS + ('sql', 'rendering')
+
+    def __init__(self):
+        for field in FIELDS:
+            setattr(self, field, 0)
+        self.sql = []
+        self.rendering = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            if len(self.sql) < MAX_SQL:
+                self.sql.append((sql, duration))
+
+
+def current():
+    return getattr(_local, 'sample', None)
+
+
+def record_cache(hit):
+    sample = current()
+    if sample is not None:
+        if hit:
+            sample.cache_hits += 1
+        else:
+            sample.cache_misses += 1
+
+
+def quantile(values, q):
+    """Процентиль по методу ближайшего ранга; values отсортированы."""
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+class Registry:
+    """Кольцевые буферы замеров по представлениям и накопленные суммы."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._windows = {}
+            self._totals = {}
+            self._counts = Counter()
+            self._statuses = Counter()
+            self._slow_total = Counter()
+            self.slow = deque(maxlen=getattr(
+                settings, 'METRICS_SLOW_SAMPLES', 20))
+
+    def record(self, view, sample, request, response):
+        values = tuple(getattr(sample, field) for field in FIELDS)
+        slow_ms = getattr(settings, 'METRICS_SLOW_MS', 500)
+        slow = sample.latency * 1000 >= slow_ms
+        with self._lock:
+            window = self._windows.get(view)
+            if window is None:
+                window = self._windows[view] = deque(maxlen=getattr(
+                    settings, 'METRICS_BUFFER_SIZE', 1000))
+                self._totals[view] = [0] * len(FIELDS)
+            window.append(values)
+            totals = self._totals[view]
+            for index, value in enumerate(values):
+                totals[index] += value
+            self._counts[view] += 1
+            self._statuses[view, response.status_code] += 1
+            if slow:
+                self._slow_total[view] += 1
+                self.slow.append(self.slow_entry(view, sample, request,
+                                                 response))
+        if slow:
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.0f мс, запросов к БД %d '
+                '(%.0f мс)', request.method, request.path, view,
+                sample.latency * 1000, sample.queries, sample.db_time * 1000)
+
+    @staticmethod
+    def slow_entry(view, sample, request, response):
+        return {
+            'time': time.time(),
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'latency_ms': round(sample.latency * 1000, 3),
+            'db_ms': round(sample.db_time * 1000, 3),
+            'template_ms': round(sample.template_time * 1000, 3),
+            'queries': sample.queries,
+            'sql': [{'sql': sql, 'ms': round(duration * 1000, 3)}
+                    for sql, duration in sample.sql],
+        }
+
+    def snapshot(self):
+        """{view: {'count': n, 'sum': {...}, 'quantiles': {...}}}."""
+        with self._lock:
+            windows = {view: list(window)
+                       for view, window in self._windows.items()}
+            totals = {view: list(values)
+                      for view, values in self._totals.items()}
+            counts = dict(self._counts)
+        result = {}
+        for view, window in windows.items():
+            columns = [sorted(column) for column in zip(*window)]
+            result[view] = {
+                'count': counts[view],
+                'sum': dict(zip(FIELDS, totals[view])),
+                'quantiles': {
+                    field: {q: quantile(column, q) for q in QUANTILES}
+                    for field, column in zip(FIELDS, columns)
+                },
+            }
+        return result
+
+    def exposition(self):
+        """Текст в формате Prometheus (text/plain, версия 0.0.4)."""
+        snapshot = self.snapshot()
+        lines = []
+        for field, name, help_text in SUMMARIES:
+            lines += [f'# HELP yatube_{name} {help_text}',
+                      f'# TYPE yatube_{name} summary']
+            for view, data in sorted(snapshot.items()):
+                label = f'view="{escape_label(view)}"'
+                for q, value in data['quantiles'][field].items():
+                    lines.append(f'yatube_{name}{{{label},quantile="{q}"}} '
+                                 f'{value:g}')
+                lines.append(f'yatube_{name}_sum{{{label}}} '
+                             f'{data["sum"][field]:g}')
+                lines.append(f'yatube_{name}_count{{{label}}} '
+                             f'{data["count"]}')
+        lines += ['# HELP yatube_requests_total Ответы по кодам статуса',
+                  '# TYPE yatube_requests_total counter']
+        with self._lock:
+            statuses = sorted(self._statuses.items())
+            slow_total = sorted(self._slow_total.items())
+        for (view, status), count in statuses:
+            lines.append(f'yatube_requests_total{{view="{escape_label(view)}"'
+                         f',status="{status}"}} {count}')
+        lines += ['# HELP yatube_slow_requests_total Запросы дольше '
+                  'METRICS_SLOW_MS',
+                  '# TYPE yatube_slow_requests_total counter']
+        for view, count in slow_total:
+            lines.append(f'yatube_slow_requests_total'
+                         f'{{view="{escape_label(view)}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def slow_requests(self):
+        """Медленные запросы, начиная с последнего."""
+        with self._lock:
+            return list(self.slow)[::-1]
+
+
+registry = Registry()
+
+
+def escape_label(value):
+    return (value.replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else '<unresolved>'
+
+
+class MetricsMiddleware:
+    """Ставится первым в MIDDLEWARE, чтобы время ответа включало
+    работу остальных промежуточных слоёв."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not enabled():
+            return self.get_response(request)
+        sample = _local.sample = Sample()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(sample.execute))
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        sample.latency = time.perf_counter() - start
+        view = view_name(request)
+        if view not in EXCLUDED_VIEWS:
+            registry.record(view, sample, request, response)
+        return response
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        sample = current()
+        if sample is None:
+            return super().render(context, request)
+        # Вложенная отрисовка (render_to_string внутри шаблона) уже
+        # входит во время внешней.
+        sample.rendering += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.rendering -= 1
+            if not sample.rendering:
+                sample.template_time += time.perf_counter() - start
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, замеряющий время отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name),
+                                 self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def check_access(request, token_setting='METRICS_TOKEN'):
+    """Пускает персонал сайта или запрос с заголовком
+    ``Authorization: Bearer`` и токеном из настройки token_setting."""
+    token = getattr(settings, token_setting, '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(header.encode(),
+                                     f'Bearer {token}'.encode()):
+        return
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+
+def metrics(request):
+    check_access(request)
+    return HttpResponse(registry.exposition(), content_type=CONTENT_TYPE)
+
+
+def metrics_slow(request):
+    check_access(request)
+    return JsonResponse({'results': registry.slow_requests()},
+                        json_dumps_params={'ensure_ascii': False})
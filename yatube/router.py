@@ -0,0 +1,91 @@
+"""Чтение с реплик базы данных.
+
+ReplicaMiddleware разрешает запросам GET, HEAD и OPTIONS читать с
+реплик из settings.DATABASE_REPLICAS (одна случайная на весь запрос),
+а ReplicaRouter направляет туда чтение. Запись всегда идёт в default.
+
+Реплика отстаёт от основной базы, поэтому после записи (новый пост,
+комментарий, лайк — любой вызов db_for_write) чтение до конца запроса
+идёт с основной базы, а ответ ставит cookie, которая ещё
+REPLICA_PIN_SECONDS секунд держит на ней все запросы этого
+пользователя: он сразу видит то, что только что написал.
+
+Вне запросов (команды, фоновые потоки) всё читается с основной базы.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Сессии читаются в каждом запросе и пишутся при входе: отставание
+# реплики разлогинивало бы пользователя.
+PRIMARY_APPS = {'sessions'}
+
+_local = threading.local()
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются оттуда же, откуда сам объект.
+            return instance._state.db
+        replica = getattr(_local, 'replica', None)
+        if (replica is None or getattr(_local, 'wrote', False) or
+                model._meta.app_label in PRIMARY_APPS):
+            return PRIMARY
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        instance = hints.get('instance')
+        if (instance is not None and instance._state.db and
+                instance._state.db not in replicas()):
+            return instance._state.db
+        # Объект, прочитанный с реплики, сохраняется в основную базу.
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схему реплик обновляет репликация, а не migrate.
+        return None if db == PRIMARY or db not in replicas() else False
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        available = replicas()
+        use_replica = (available and request.method in SAFE_METHODS and
+                       PIN_COOKIE not in request.COOKIES)
+        _local.replica = random.choice(available) if use_replica else None
+        _local.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _local.wrote
+        finally:
+            _local.replica = None
+            _local.wrote = False
+        if wrote and available:
+            response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(),
+                                httponly=True, samesite='Lax')
+        return response
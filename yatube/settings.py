@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,7 +27,7 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -52,14 +53,16 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
     'corsheaders',
     'rest_framework.authtoken',
     'django_filters',
     'drf_spectacular',
+    'yatube.apps.YatubeConfig',
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.router.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,16 +70,21 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Панель отладки только для разработки: в бою она замедляет каждый
+# ответ и раскрывает SQL.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.InstrumentedTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -97,12 +105,78 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# По умолчанию — локальный файл SQLite (режим WAL, см. yatube/db.py
+# и yatube/sqlite3). Тестовая база SQLite тоже файловая, чтобы
+# многопоточные тесты работали с настоящими блокировками; в имени файла
+# pid процесса, чтобы одновременные прогоны не затирали базы друг друга.
+# Для сервера задайте DB_ENGINE=postgresql и параметры подключения;
+# соединения живут DB_CONN_MAX_AGE секунд и проверяются перед запросом.
+# При DB_POOLER=pgbouncer (режим transaction) отключаются серверные
+# курсоры, которые не переживают смену соединения в пуле.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yatube.sqlite3',
+            'NAME': os.getenv('DB_NAME',
+                              os.path.join(BASE_DIR, 'db.sqlite3')),
+            'TEST': {
+                'NAME': os.getenv(
+                    'DB_TEST_NAME',
+                    os.path.join(tempfile.gettempdir(),
+                                 f'yatube_test_{os.getpid()}.sqlite3')),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': os.getenv('DB_NAME', 'yatube'),
+            'USER': os.getenv('DB_USER', 'yatube'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', '127.0.0.1'),
+            'PORT': os.getenv('DB_PORT', ''),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_POOLER') == 'pgbouncer'),
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
     }
+
+# Реплики только для чтения: DB_REPLICAS — через запятую файлы SQLite
+# или адреса host[:port] серверов-реплик с теми же учётными данными.
+# Безопасные запросы читают с них (yatube/router.py), после записи
+# пользователь REPLICA_PIN_SECONDS секунд читает с основной базы.
+DB_REPLICAS = [location for location in os.getenv('DB_REPLICAS', '').split(',')
+               if location]
+DATABASE_REPLICAS = []
+for number, location in enumerate(DB_REPLICAS, 1):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if DB_ENGINE == 'sqlite3':
+        replica['NAME'] = location
+    else:
+        host, _, port = location.partition(':')
+        replica.update(HOST=host, PORT=port or replica['PORT'])
+    DATABASES[f'replica{number}'] = replica
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['yatube.router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Проверять постоянные соединения перед каждым запросом и
+# переподключаться, если сервер их закрыл.
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', 'True') == 'True'
+
+# Прагмы SQLite поверх значений по умолчанию из yatube/db.py,
+# None отключает прагму.
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
 }
+# DEFERRED, IMMEDIATE или EXCLUSIVE — как SQLite начинает транзакции.
+SQLITE_TRANSACTION_MODE = os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
 
 
 # Password validation
@@ -150,6 +224,28 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Лимиты загружаемых картинок, см. posts/uploads.py.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.UploadSizeLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', 20 * 1024 * 1024))
+# JPEG декодируется уменьшенным, поэтому допускает больше пикселей,
+# чем форматы, которые приходится декодировать целиком.
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 100_000_000))
+IMAGE_MAX_FULL_DECODE_PIXELS = int(
+    os.getenv('IMAGE_MAX_FULL_DECODE_PIXELS', 16_000_000))
+IMAGE_MAX_SIDE = int(os.getenv('IMAGE_MAX_SIDE', 2560))
+
+# Рейтинг популярных постов, см. posts/trending.py: за сколько секунд
+# вес события уменьшается вдвое и как часто запускать decay_trending.
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', 12 * 60 * 60))
+TRENDING_PERIOD = int(os.getenv('TRENDING_PERIOD', 60 * 60))
+
+# Словарь PostgreSQL для полнотекстового поиска, см. posts/search.py.
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'russian')
+
 
 # Login
 
@@ -169,12 +265,78 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 # Идентификатор текущего сайта
 SITE_ID = 1
 
+# Кэш. CACHE_BACKEND выбирает хранилище: locmem — память процесса
+# (только для разработки и одного воркера: сброс страниц и ETag требуют
+# общего кэша, см. check --deploy), file — общий для процессов каталог
+# на диске, redis и memcached — сетевой кэш по адресу из CACHE_LOCATION.
+# Смена CACHE_VERSION разом делает недействительными все ключи.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_LOCATIONS = {
+    'file': os.path.join(BASE_DIR, '.cache'),
+    'memcached': '127.0.0.1:11211',
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.cache.InstrumentedCache',
+        'TARGET_BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION',
+                              CACHE_LOCATIONS.get(CACHE_BACKEND, '')),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'yatube'),
+        'VERSION': int(os.getenv('CACHE_VERSION', 1)),
     }
 }
 
+# Сколько секунд анонимные посетители получают страницы лент и постов
+# из кэша целиком (posts/cache.py); 0 — не кэшировать страницы.
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 30))
+
+# Режим постраничного вывода лент: 'page' — номера страниц (Paginator),
+# 'cursor' — курсор по (pub_date, id) без COUNT и OFFSET.
+FEED_PAGINATION = os.getenv('FEED_PAGINATION', 'page')
+
+# Авторы, у которых подписчиков больше этого числа, не раскладываются
+# по лентам подписок при публикации, а подмешиваются при чтении.
+TIMELINE_FANOUT_LIMIT = int(os.getenv('TIMELINE_FANOUT_LIMIT', 5000))
+
+# Сколько потоков строят превью картинок в фоне; 0 — строить сразу
+# при сохранении поста.
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+
+# Ширины вариантов картинок постов (posts/variants.py) в пикселях.
+IMAGE_VARIANT_WIDTHS = (320, 480, 640, 768, 960)
+
+# Тесты строят превью сразу, без фоновых потоков.
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
+
+# Буфер лайков (posts/likes.py): сколько лайков и отмен копить в
+# памяти процесса перед записью пачкой и сколько секунд ждать
+# заполнения; 0 — писать каждый лайк сразу. Буфер сбрасывается при
+# обычном завершении процесса, при аварийном — теряется.
+LIKE_BUFFER_SIZE = int(os.getenv('LIKE_BUFFER_SIZE', 0))
+LIKE_BUFFER_INTERVAL = float(os.getenv('LIKE_BUFFER_INTERVAL', 1))
+
+# Метрики запросов (yatube/metrics.py): /metrics/ для Prometheus.
+# METRICS_TOKEN — токен для заголовка Authorization: Bearer; без него
+# страница доступна только персоналу сайта.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_BUFFER_SIZE = int(os.getenv('METRICS_BUFFER_SIZE', 1000))
+METRICS_SLOW_MS = int(os.getenv('METRICS_SLOW_MS', 500))
+METRICS_SLOW_SAMPLES = int(os.getenv('METRICS_SLOW_SAMPLES', 20))
+
+# Выгрузка данных (posts/export.py): /export/<таблица>/ для персонала
+# или по токену; строки читаются из базы пачками по EXPORT_CHUNK_SIZE.
+EXPORT_TOKEN = os.getenv('EXPORT_TOKEN', '')
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -189,6 +351,8 @@ REST_FRAMEWORK = {
         ],
         'DEFAULT_FILTER_BACKENDS': [
             'django_filters.rest_framework.DjangoFilterBackend'],
+        'DEFAULT_PAGINATION_CLASS': 'api.pagination.CursorPagination',
+        'PAGE_SIZE': 10,
     }
 
 CORS_ORIGIN_ALLOW_ALL = True
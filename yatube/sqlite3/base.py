@@ -0,0 +1,18 @@
+"""SQLite, открывающий транзакции сразу на запись.
+
+Обычный BEGIN откладывает блокировку до первой записи. Если между
+чтением и записью внутри transaction.atomic() другой процесс успел
+что-то записать, SQLite сразу отвечает «database is locked», не
+дожидаясь busy_timeout. BEGIN IMMEDIATE берёт блокировку записи в
+начале транзакции, и конкурирующие писатели просто ждут своей очереди.
+Режим задаётся настройкой SQLITE_TRANSACTION_MODE.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        mode = getattr(settings, 'SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+        self.cursor().execute(f'BEGIN {mode}'.strip())
@@ -0,0 +1,19 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Запуск manage.py test: картинки постов обрабатываются сразу.
+
+    Фоновые потоки posts/thumbnails.py пережили бы тест и писали бы
+    варианты в MEDIA_ROOT уже после его очистки.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(THUMBNAIL_WORKERS=0)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -10,7 +10,9 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from posts import export
 from posts import views as posts_views
+from yatube import metrics
 
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa
@@ -38,6 +40,9 @@ urlpatterns = [
     path('auth/',
          include('django.contrib.auth.urls')),
     path('api/', include('api.urls')),
+    path('metrics/', metrics.metrics, name='metrics'),
+    path('metrics/slow/', metrics.metrics_slow, name='metrics_slow'),
+    path('export/<str:table>/', export.export, name='export'),
     path('',
          include('posts.urls')),
     path('404/',